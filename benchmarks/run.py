@@ -0,0 +1,191 @@
+"""Run benchmark of Typst builders with synthetic projects.
+
+Usage:
+
+.. code-block:: console
+
+   # Measure and compare with stored baseline.
+   python benchmarks/run.py small medium
+   # Measure and store results as baseline.
+   python benchmarks/run.py small medium --save-baseline
+
+Each build runs on fresh Python process
+to measure peak memory of the build only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+
+import synthetic
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+"""Default path of baseline."""
+
+BUILDERS = ("typst", "typstpdf")
+"""Builders to measure."""
+
+METRICS = ("seconds", "rebuild_seconds", "peak_memory", "output_size")
+"""Metrics that are compared with baseline."""
+
+
+@dataclass
+class Result:
+    """Measured values of a builder."""
+
+    seconds: float
+    """Wall time of first build."""
+    rebuild_seconds: float
+    """Wall time of second build without any changes."""
+    peak_memory: int
+    """Peak RSS (bytes) of first build."""
+    output_size: int
+    """Total size (bytes) of generated documents."""
+
+
+def _worker(srcdir: str, outdir: str, builder: str):
+    """Run build in this process and print measured values as JSON."""
+    import resource
+
+    from sphinx.cmd.build import build_main
+
+    start = time.perf_counter()
+    status = build_main(["-q", "-b", builder, srcdir, outdir])
+    seconds = time.perf_counter() - start
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS.
+    if sys.platform != "darwin":
+        max_rss *= 1024
+    print(json.dumps({"status": status, "seconds": seconds, "peak_memory": max_rss}))
+
+
+def _run_build(srcdir: Path, outdir: Path, builder: str) -> dict:
+    cmd = [sys.executable, __file__, "--worker", str(srcdir), str(outdir), builder]
+    proc = subprocess.run(cmd, capture_output=True, text=True, check=False)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr)
+    data = json.loads(proc.stdout.strip().splitlines()[-1])
+    if data["status"] != 0:
+        raise RuntimeError(f"Build failed: {builder} ({srcdir})\n{proc.stderr}")
+    return data
+
+
+def measure(scenario: synthetic.Scenario, workdir: Path) -> dict[str, Result]:
+    """Build synthetic project by each builders and measure it."""
+    srcdir = synthetic.generate(scenario, workdir / "src")
+    results = {}
+    for builder in BUILDERS:
+        outdir = workdir / "out" / builder
+        first = _run_build(srcdir, outdir, builder)
+        second = _run_build(srcdir, outdir, builder)
+        suffix = ".pdf" if builder == "typstpdf" else ".typ"
+        output_size = sum(p.stat().st_size for p in outdir.glob(f"*{suffix}"))
+        results[builder] = Result(
+            seconds=first["seconds"],
+            rebuild_seconds=second["seconds"],
+            peak_memory=first["peak_memory"],
+            output_size=output_size,
+        )
+    return results
+
+
+def compare(
+    current: dict[str, dict[str, Result]],
+    baseline: dict[str, dict[str, dict]],
+    tolerance: float,
+) -> list[str]:
+    """Find metrics that are worse than baseline over tolerance.
+
+    :returns: Messages of regressions.
+    """
+    regressions = []
+    for scenario, builders in current.items():
+        for builder, result in builders.items():
+            base = baseline.get(scenario, {}).get(builder)
+            if base is None:
+                continue
+            for metric in METRICS:
+                value, expected = getattr(result, metric), base[metric]
+                if expected and value > expected * (1 + tolerance):
+                    regressions.append(
+                        f"{scenario}/{builder}/{metric}: "
+                        f"{value:.3f} > {expected:.3f} (+{value / expected - 1:.0%})"
+                    )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:  # noqa: D103
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", default=["small"])
+    for field in fields(synthetic.Scenario)[1:]:
+        parser.add_argument(
+            f"--{field.name.replace('_', '-')}",
+            type=int,
+            help=f"Override {field.name} of scenarios.",
+        )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed ratio of regression from baseline.",
+    )
+    parser.add_argument("--workdir", type=Path, help="Keep generated projects here.")
+    args = parser.parse_args(argv)
+
+    overrides = {
+        f.name: v
+        for f in fields(synthetic.Scenario)[1:]
+        if (v := getattr(args, f.name)) is not None
+    }
+    current: dict[str, dict[str, Result]] = {}
+    for name in args.scenarios:
+        scenario = replace(synthetic.SCENARIOS[name], **overrides)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            workdir = (args.workdir or Path(tmpdir)) / name
+            current[name] = measure(scenario, workdir)
+        for builder, result in current[name].items():
+            print(
+                f"{name:<8} {builder:<9} "
+                f"{result.seconds:8.2f}s (rebuild {result.rebuild_seconds:6.2f}s) "
+                f"{result.peak_memory / 1024**2:8.1f} MiB "
+                f"{result.output_size / 1024:10.1f} KiB"
+            )
+
+    data = {
+        name: {builder: asdict(result) for builder, result in builders.items()}
+        for name, builders in current.items()
+    }
+    if args.save_baseline:
+        baseline = (
+            json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        )
+        baseline |= data
+        args.baseline.write_text(json.dumps(baseline, indent=2) + os.linesep)
+        print(f"Saved baseline into {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print("Baseline is not found. Run with --save-baseline at first.")
+        return 0
+    regressions = compare(
+        current, json.loads(args.baseline.read_text()), args.tolerance
+    )
+    for message in regressions:
+        print(f"REGRESSION: {message}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--worker":
+        _worker(*sys.argv[2:])
+    else:
+        sys.exit(main())
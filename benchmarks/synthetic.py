@@ -0,0 +1,232 @@
+"""Generator of synthetic Sphinx projects for benchmark.
+
+Generated project has pages that are nested by toctree,
+and each page has contents that are heavy for builders
+(images, index entries, autodoc ``desc`` blocks and long tables).
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+import textwrap
+import zlib
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@dataclass
+class Scenario:
+    """Size of synthetic project."""
+
+    name: str
+    """Name of scenario."""
+    pages: int = 10
+    """Number of pages (without root page)."""
+    depth: int = 2
+    """Depth of toctree."""
+    images: int = 1
+    """Number of images for each pages."""
+    index_entries: int = 5
+    """Number of index entries for each pages."""
+    desc_blocks: int = 5
+    """Number of autodoc objects for each pages."""
+    table_rows: int = 20
+    """Number of rows of long table for each pages."""
+
+    def to_dict(self) -> dict:  # noqa: D102
+        return asdict(self)
+
+
+SCENARIOS = {
+    s.name: s
+    for s in [
+        Scenario("small"),
+        Scenario(
+            "medium",
+            pages=100,
+            depth=3,
+            images=2,
+            index_entries=10,
+            desc_blocks=10,
+            table_rows=50,
+        ),
+        Scenario(
+            "large",
+            pages=500,
+            depth=4,
+            images=3,
+            index_entries=20,
+            desc_blocks=20,
+            table_rows=200,
+        ),
+    ]
+}
+"""Preset scenarios."""
+
+CONF_PY = """\
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+project = "Synthetic project"
+copyright = "2025, Benchmark"
+extensions = ["sphinx.ext.autodoc", "atsphinx.typst"]
+typst_documents = [
+    {
+        "entrypoint": "index",
+        "filename": "document",
+        "theme": "manual",
+        "title": "Synthetic project",
+    }
+]
+"""
+
+
+def _png(width: int, height: int, seed: int) -> bytes:
+    """Create RGB PNG image without any image libraries."""
+
+    def _chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    rows = b"".join(
+        b"\x00"
+        + bytes(
+            ((x * 7 + seed) % 256, (y * 5 + seed) % 256, (x + y + seed) % 256)[c]
+            for x in range(width)
+            for c in range(3)
+        )
+        for y in range(height)
+    )
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _chunk(b"IHDR", header)
+        + _chunk(b"IDAT", zlib.compress(rows))
+        + _chunk(b"IEND", b"")
+    )
+
+
+def _build_tree(pages: int, depth: int) -> dict[str, list[str]]:
+    """Distribute pages into toctree that has ``depth`` levels.
+
+    :returns: Children docnames for each docnames.
+    """
+    depth = max(depth, 1)
+    branches = max(2, math.ceil(pages ** (1 / depth)))
+    tree: dict[str, list[str]] = {"index": []}
+    queue = [("index", 0)]
+    created = 0
+    while queue and created < pages:
+        parent, level = queue.pop(0)
+        if level >= depth:
+            continue
+        for _ in range(branches):
+            if created >= pages:
+                break
+            created += 1
+            docname = f"pages/page{created:04d}"
+            tree[parent].append(docname)
+            tree[docname] = []
+            queue.append((docname, level + 1))
+    return tree
+
+
+def _page(docname: str, children: list[str], scenario: Scenario, seq: int) -> str:
+    title = f"Page {seq}" if docname != "index" else "Synthetic project"
+    lines = [title, "=" * (len(title) + 2), ""]
+    for n in range(scenario.index_entries):
+        kind = ("single", "pair", "triple", "see", "seealso")[n % 5]
+        value = {
+            "single": f"term{seq}-{n}",
+            "pair": f"term{seq}; pair{n}",
+            "triple": f"term{seq}; triple{n}; item",
+            "see": f"alias{seq}-{n}; term{seq}-0",
+            "seealso": f"related{seq}-{n}; term{seq}-0",
+        }[kind]
+        lines += [f".. index:: {kind}: {value}", ""]
+    lines += [
+        "Section",
+        "-------",
+        "",
+        textwrap.fill(" ".join(["Lorem ipsum dolor sit amet."] * 20), 80),
+        "",
+    ]
+    prefix = "../" * docname.count("/")
+    for n in range(scenario.images):
+        lines += [f".. image:: {prefix}_images/image{(seq + n) % 10}.png", ""]
+    if scenario.desc_blocks:
+        lines += ["API", "---", ""]
+        for n in range(scenario.desc_blocks):
+            lines += [f".. autofunction:: synthetic_api.page{seq}_func{n}", ""]
+    if scenario.table_rows:
+        lines += [
+            "Table",
+            "-----",
+            "",
+            ".. list-table::",
+            "   :header-rows: 1",
+            "",
+            "   * - Key",
+            "     - Value",
+        ]
+        for n in range(scenario.table_rows):
+            lines += [f"   * - key{n}", f"     - value of ``{docname}`` {n}"]
+        lines.append("")
+    if children:
+        lines += [".. toctree::", ""]
+        lines += [f"   /{child}" for child in children]
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _api_module(scenario: Scenario, pages: int) -> str:
+    # Each page documents own functions to avoid duplicated object descriptions.
+    lines = ['"""Synthetic module for autodoc."""', ""]
+    for seq in range(pages):
+        for n in range(scenario.desc_blocks):
+            lines += _api_function(f"page{seq}_func{n}", n)
+    return "\n".join(lines)
+
+
+def _api_function(name: str, n: int) -> list[str]:
+    return [
+        "",
+        f"def {name}(value: int, name: str = 'x') -> str:",
+        f'    """Do something {n}.',
+        "",
+        "    :param value: Value to process.",
+        "    :param name: Name of value.",
+        "    :returns: Processed value.",
+        '    """',
+        "",
+    ]
+
+
+def generate(scenario: Scenario, dest: Path) -> Path:
+    """Generate synthetic project into directory.
+
+    :param scenario: Size of project.
+    :param dest: Directory to create project.
+    :returns: Source directory.
+    """
+    dest.mkdir(parents=True, exist_ok=True)
+    tree = _build_tree(scenario.pages, scenario.depth)
+    (dest / "conf.py").write_text(CONF_PY, encoding="utf8")
+    (dest / "synthetic_api.py").write_text(
+        _api_module(scenario, len(tree)), encoding="utf8"
+    )
+    (dest / "_images").mkdir(exist_ok=True)
+    for n in range(10):
+        (dest / "_images" / f"image{n}.png").write_bytes(_png(320, 240, n * 31))
+    (dest / "pages").mkdir(exist_ok=True)
+    for seq, (docname, children) in enumerate(tree.items()):
+        (dest / f"{docname}.rst").write_text(
+            _page(docname, children, scenario, seq), encoding="utf8"
+        )
+    return dest
@@ -0,0 +1,170 @@
+"""Helpers to copy assets into output directory.
+
+These skip files that are already copied,
+because rewriting unchanged files is expensive and it changes mtime of outputs.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Literal
+
+from . import caching
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+COPY_MODE_LITERAL = Literal["copy", "hardlink", "reflink"]
+COPY_MODES = ("copy", "hardlink", "reflink")
+
+# ioctl request code to clone file on Linux (FICLONE).
+_FICLONE = 0x40049409
+
+
+def is_up_to_date(src: Path, dest: Path) -> bool:
+    """Check that destination has same content as source.
+
+    It compares size and mtime at first, and compares hash only when mtime is different.
+    """
+    if not dest.exists():
+        return False
+    if os.path.samefile(src, dest):
+        return True
+    src_stat, dest_stat = src.stat(), dest.stat()
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+        return True
+    return caching.hash_content(src) == caching.hash_content(dest)
+
+
+def copy_file(src: Path, dest: Path, mode: COPY_MODE_LITERAL = "copy"):
+    """Copy file with keeping mtime.
+
+    When ``mode`` is ``hardlink`` or ``reflink`` and filesystem does not support it,
+    this falls back to copy.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    # Remove at first to avoid writing into linked source.
+    dest.unlink(missing_ok=True)
+    if mode == "hardlink":
+        try:
+            os.link(src, dest)
+            return
+        except OSError:
+            pass
+    elif mode == "reflink":
+        try:
+            _reflink(src, dest)
+            shutil.copystat(src, dest)
+            return
+        except OSError:
+            dest.unlink(missing_ok=True)
+    shutil.copy2(src, dest)
+
+
+def _reflink(src: Path, dest: Path):
+    import fcntl
+
+    with src.open("rb") as src_fp, dest.open("wb") as dest_fp:
+        fcntl.ioctl(dest_fp.fileno(), _FICLONE, src_fp.fileno())
+
+
+def copy_files(
+    files: dict[Path, Path] | list[tuple[Path, Path]],
+    mode: COPY_MODE_LITERAL = "copy",
+    max_workers: int | None = None,
+) -> list[Path]:
+    """Copy multiple files on thread pool.
+
+    Files that are up to date and sources that do not exist are skipped.
+    When some sources have same content, it is copied once
+    and other destinations are created as hardlink of it.
+
+    :param files: Source paths to destination paths (mapping or pairs).
+    :param mode: Copy mode for each files.
+    :param max_workers: Number of threads.
+    :returns: Copied destination paths.
+    """
+    pending = [
+        (src, dest)
+        for src, dest in sorted(files.items() if isinstance(files, dict) else files)
+        # Sphinx already warns missing images while reading.
+        if src.is_file() and not is_up_to_date(src, dest)
+    ]
+    # Hash only files that have same size with others.
+    sizes: dict[int, int] = {}
+    for src, _ in pending:
+        size = src.stat().st_size
+        sizes[size] = sizes.get(size, 0) + 1
+    primaries: list[tuple[Path, Path]] = []
+    duplicates: list[tuple[Path, Path]] = []
+    origins: dict[str, Path] = {}
+    for src, dest in pending:
+        if sizes[src.stat().st_size] == 1:
+            primaries.append((src, dest))
+            continue
+        digest = caching.hash_content(src)
+        if digest in origins:
+            duplicates.append((origins[digest], dest))
+            continue
+        origins[digest] = dest
+        primaries.append((src, dest))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(lambda item: copy_file(*item, mode=mode), primaries))
+    for origin, dest in duplicates:
+        copy_file(origin, dest, mode="hardlink")
+    return [dest for _, dest in pending]
+
+
+@dataclass
+class SyncResult:
+    """What :func:`sync_files` did."""
+
+    copied: list[Path] = field(default_factory=list)
+    """Destination paths that are copied."""
+    removed: list[Path] = field(default_factory=list)
+    """Stale paths that are removed."""
+    total: int = 0
+    """Number of all files to sync."""
+
+
+def collect_files(src: Path, dest: Path) -> dict[Path, Path]:
+    """Collect files to copy from source into destination directory.
+
+    This works same as :func:`sphinx.util.fileutil.copy_asset`
+    that copies file into directory or copies all files in directory.
+    """
+    if src.is_file():
+        return {src: dest / src.name}
+    if not src.is_dir():
+        return {}
+    return {p: dest / p.relative_to(src) for p in src.rglob("*") if p.is_file()}
+
+
+def sync_files(
+    files: dict[Path, Path], dest_root: Path, mode: COPY_MODE_LITERAL = "copy"
+) -> SyncResult:
+    """Copy changed files and remove stale files in destination directory.
+
+    :param files: Source paths to destination paths. Destinations are in ``dest_root``.
+    :param dest_root: Directory to sync.
+    :param mode: Copy mode for each files.
+    """
+    result = SyncResult(copied=copy_files(files, mode=mode), total=len(files))
+    if not dest_root.is_dir():
+        return result
+    expected = set(files.values())
+    # Reverse order to visit children before parent directory.
+    for path in sorted(dest_root.rglob("*"), reverse=True):
+        if path.is_dir() and not path.is_symlink():
+            if not any(path.iterdir()):
+                path.rmdir()
+        elif path not in expected:
+            path.unlink()
+            result.removed.append(path)
+    return result
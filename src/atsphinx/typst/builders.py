@@ -2,31 +2,80 @@
 
 from __future__ import annotations
 
-from datetime import date
+import multiprocessing
+import os
+import time
+from concurrent.futures import (
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from datetime import date, datetime, timezone
+from importlib import metadata
 from pathlib import Path
 from typing import TYPE_CHECKING
 
 from docutils import nodes
-from rst2typst.package import install_package
 from rst2typst.package import package_dir as rst2typst_package_dir
 from sphinx import addnodes
-from sphinx._cli.util.colour import darkgreen
+from sphinx._cli.util.colour import bold, darkgreen
 from sphinx.builders import Builder
 from sphinx.errors import SphinxError
-from sphinx.util.fileutil import copy_asset, copy_asset_file
+from sphinx.locale import __
+from sphinx.util.logging import getLogger
+from sphinx.util.matching import Matcher
 from sphinx.util.nodes import inline_all_toctrees
+from sphinx.util.parallel import ParallelTasks
 
-from . import config, theming, writer
+from . import (
+    assets,
+    caching,
+    config,
+    imaging,
+    indexing,
+    packages,
+    profiling,
+    theming,
+    vendoring,
+    writer,
+)
 
 if TYPE_CHECKING:
+    from typing import Any
+
     from docutils import nodes
     from sphinx.application import Sphinx
     from sphinx.environment import BuildEnvironment
 
-    from .config import DocumentSettings
+    from .config import DocumentSettings, OutputFormatSettings
+
+logger = getLogger(__name__)
 
 typst_package_dir = Path(__file__).parent / "package"
 
+CHAPTERS_DIR = "_chapters"
+"""Directory of split files in output directory."""
+
+
+def resolve_build_timestamp(build_date: str | None) -> int | None:
+    """Resolve timestamp of build for reproducible output.
+
+    It uses :confval:`typst_build_date` (ISO 8601 date) at first,
+    and ``SOURCE_DATE_EPOCH`` environment variable at second.
+
+    :returns: Seconds from epoch, or ``None`` when both are not set.
+    """
+    if build_date:
+        value = datetime.fromisoformat(build_date)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if epoch:
+        return int(epoch)
+    return None
+
 
 class TypstBuilder(Builder):
     """Custom builder to generate Typst source from doctree."""
@@ -34,62 +83,422 @@ class TypstBuilder(Builder):
     name = "typst"
     format = "typst"
     default_translator_class = writer.TypstTranslator
+    allow_parallel = True
 
     def __init__(self, app: Sphinx, env: BuildEnvironment) -> None:  # noqa: D107
         super().__init__(app, env)
         self._static_dir = Path(self.outdir / "_static")
         self._images_dir = Path(self.outdir / "_images")
-        self._build_date = date.today()
+        self._build_timestamp = resolve_build_timestamp(self.config.typst_build_date)
+        """Timestamp for reproducible build (``None`` when it uses current time)."""
+        self._build_date = (
+            date.today()
+            if self._build_timestamp is None
+            else datetime.fromtimestamp(self._build_timestamp, timezone.utc).date()
+        )
 
     def init(self):  # noqa: D102
         super().init()
         self._themes: dict[str, theming.Theme] = {}
+        self.timings = profiling.Timings()
+        """Elapsed time of phases in current build."""
+        self.node_profile: profiling.NodeProfile | None = None
+        """Measured values of translator (only when profiling is enabled)."""
+        self.packages = packages.PackageRegistry()
+        """Typst packages that are imported by any written documents."""
+        self._build_info = caching.BuildInfo.load(
+            Path(self.outdir) / caching.BUILD_INFO_FILENAME
+        )
+        self.shared_cache: caching.SharedCache | None = None
+        """Cache directory that is shared with other builds."""
+        if self.config.typst_cache_dir is not None:
+            self.shared_cache = caching.SharedCache(
+                self.config.typst_cache_dir, self.config.typst_cache_max_size
+            )
+        self.fragments = caching.FragmentCache.load(
+            Path(self.doctreedir) / caching.FRAGMENTS_FILENAME, self.shared_cache
+        )
+        self._source_digests: dict[str, str] = {}
+        self.excluded_docnames: set[str] = set()
+        """Docnames that are not written into current document (partial build)."""
+        if self.config.typst_image_optimization is not None:
+            try:
+                import PIL  # noqa - Only try importing
+            except ImportError:
+                raise SphinxError("Require 'pillow' to optimize images.")
 
-    def get_outdated_docs(self):  # noqa: D102
-        return "all targets"
+    def get_outdated_docs(self):
+        """Find docnames that are included in outdated documents.
 
-    def prepare_writing(self, docnames: set[str]) -> None:  # noqa: D102
-        # Preload themes to copy assets before write_documents.
-        def _load_theme(name: str) -> theming.Theme | None:
-            if name in self._themes:
-                return
+        Builder writes each documents of ``typst_documents`` (not each docnames).
+        This returns docnames of documents that must be written again,
+        and Sphinx skips writing phase when nothing is returned.
+        """
+        for document_settings in self.config.typst_documents:
+            if not self.is_outdated(document_settings):
+                continue
+            record = self._build_info.documents.get(document_settings["filename"])
+            if record is None:
+                yield document_settings["entrypoint"]
+                continue
+            yield from (d for d in record.docnames if d in self.env.found_docs)
+
+    def is_outdated(self, document_settings: DocumentSettings) -> bool:
+        """Check that document must be written again.
 
-            theme = theming.load_theme(name)
-            theme.init(self)
-            self._themes[name] = theme
-            parent = theme.get_parent_theme()
-            if parent:
-                _load_theme(parent)
+        Document is outdated when any of these are matched.
 
+        * Output file (or any split files) or build record does not exist.
+        * Document settings, theme, templates or configuration are changed.
+        * Any included docnames are read after last writing.
+        """
+        filename = document_settings["filename"]
+        record = self._build_info.documents.get(filename)
+        if record is None or not (Path(self.outdir) / f"{filename}.typ").exists():
+            return True
+        if record.fingerprint != self.compute_fingerprint(document_settings):
+            return True
+        if not all((Path(self.outdir) / p).exists() for p in record.chapters):
+            return True
+        for docname in record.docnames:
+            if self.env.all_docs.get(docname, record.built_at + 1) > record.built_at:
+                return True
+        return False
+
+    def compute_fingerprint(self, document_settings: DocumentSettings) -> str:
+        """Calculate digest of inputs for document except doctrees."""
+        theme = self._load_theme(document_settings["theme"])
+        templates_dirs = [Path(self.confdir) / p for p in self.config.templates_path]
+        return caching.compute_digest(
+            self.compute_config_digest(),
+            dict(document_settings),
+            self._build_date.isoformat(),
+            caching.stat_files(*theme.get_theme_dirs(), *templates_dirs),
+        )
+
+    def compute_config_digest(self) -> str:
+        """Calculate digest of configuration and versions that affect translation."""
+        translator = self.get_translator_class()
+        return caching.compute_digest(
+            [metadata.version(name) for name in ("atsphinx-typst", "rst2typst")],
+            f"{translator.__module__}.{translator.__qualname__}",
+            {c.name: c.value for c in self.config.filter(("env", "html"))},
+            # These do not require reading sources again.
+            self.config.typst_draft_mode,
+            self.config.typst_include_docnames,
+            sorted(self.tags),
+        )
+
+    def get_fragment_source_key(self, node: addnodes.start_of_file) -> str:
+        """Calculate key of sources that are translated into fragment of node.
+
+        It changes when any docnames in node are read again or configuration is changed.
+        When :confval:`typst_cache_dir` is set, it uses contents of sources
+        instead of read time to find fragments that other builds translated.
+        """
+        docnames = self.get_included_docnames(node)
+        if self.shared_cache is not None:
+            return caching.compute_digest(
+                self._config_digest,
+                str(self.srcdir),
+                str(self.outdir),
+                [(d, self.compute_source_digest(d)) for d in docnames],
+            )
+        return caching.compute_digest(
+            self._config_digest,
+            [(docname, self.env.all_docs.get(docname)) for docname in docnames],
+        )
+
+    def compute_source_digest(self, docname: str) -> str:
+        """Calculate digest of source file and dependencies of docname."""
+        if docname not in self._source_digests:
+            paths = [self.env.doc2path(docname)] + [
+                Path(self.srcdir) / p
+                for p in sorted(self.env.dependencies.get(docname, []))
+            ]
+            self._source_digests[docname] = caching.hash_files(*map(Path, paths))
+        return self._source_digests[docname]
+
+    def get_included_docnames(self, node: addnodes.start_of_file) -> list[str]:
+        """Find docnames that are translated into fragment of node.
+
+        When node is for streaming assembly, it does not have children doctrees yet,
+        so this finds descendants from toctrees of environment.
+        """
+        docnames = [n["docname"] for n in node.findall(addnodes.start_of_file)]
+        if not node.get("stream"):
+            return docnames
+        pending = list(docnames)
+        while pending:
+            for child in self.env.toctree_includes.get(pending.pop(0), []):
+                if child not in docnames and child not in self.excluded_docnames:
+                    docnames.append(child)
+                    pending.append(child)
+        return docnames
+
+    def get_excluded_docnames(self, document_settings: DocumentSettings) -> set[str]:
+        """Find docnames that are not written for partial build.
+
+        When :confval:`typst_include_docnames`
+        (or ``include_docnames`` of document settings) is set,
+        builder writes only matched docnames, their descendants in toctree
+        and their ancestors (to keep structure of sections from entrypoint).
+        """
+        patterns = (
+            self.config.typst_include_docnames or document_settings["include_docnames"]
+        )
+        if not patterns:
+            return set()
+        matcher = Matcher(patterns)
+        selected = {d for d in self.env.found_docs if matcher(d)}
+        if not selected:
+            logger.warning(
+                "Any docnames do not match include_docnames of '%s'.",
+                document_settings["filename"],
+            )
+        parents: dict[str, set[str]] = {}
+        for parent, children in self.env.toctree_includes.items():
+            for child in children:
+                parents.setdefault(child, set()).add(parent)
+        included = {document_settings["entrypoint"]}
+        for relations in (self.env.toctree_includes, parents):
+            pending = list(selected)
+            while pending:
+                for docname in relations.get(pending.pop(), []):
+                    if docname not in included and docname not in selected:
+                        included.add(docname)
+                        pending.append(docname)
+        return set(self.env.found_docs) - included - selected
+
+    def _load_theme(self, name: str) -> theming.Theme:
+        if name in self._themes:
+            return self._themes[name]
+
+        theme = theming.load_theme(name)
+        theme.init(self)
+        self._themes[name] = theme
+        parent = theme.get_parent_theme()
+        if parent:
+            self._load_theme(parent)
+        return theme
+
+    def build(self, *args, **kwargs) -> None:  # noqa: D102
+        self.timings = profiling.Timings()
+        if self.config.typst_profile_translator:
+            self.node_profile = profiling.NodeProfile()
+        super().build(*args, **kwargs)
+
+    def prepare_writing(self, docnames: set[str]) -> None:  # noqa: D102
+        # Preload themes to copy assets before write_documents.
         for document_settings in self.config.typst_documents:
-            _load_theme(document_settings["theme"])
+            self._load_theme(document_settings["theme"])
+        self._config_digest = self.compute_config_digest()
+        self._source_digests = {}
 
     def write_documents(self, docnames):  # noqa: D102
+        # Sphinx passes all found docnames when it runs with ``-a``.
+        force_all = docnames >= self.env.found_docs
+        groups: dict[tuple[str, Any], list[DocumentSettings]] = {}
         for document_settings in self.config.typst_documents:
-            self.write_doc(document_settings)
+            if not force_all and not self.is_outdated(document_settings):
+                logger.info(
+                    "Skip writing '%s' because it is up to date.",
+                    document_settings["filename"],
+                )
+                continue
+            key = (
+                document_settings["entrypoint"],
+                document_settings["toctree_only"],
+                tuple(document_settings["include_docnames"] or ()),
+            )
+            groups.setdefault(key, []).append(document_settings)
+        if self.parallel_ok and len(groups) > 1:
+            self._write_documents_parallel(
+                list(groups.values()), nproc=self.app.parallel
+            )
+        else:
+            for group in groups.values():
+                self.write_doc_group(group)
+                self.on_group_written(group)
+        self._remove_stale_chapters()
+        self._build_info.dump()
+        self.fragments.dump(self.env.found_docs)
+
+    def _write_documents_parallel(
+        self, groups: list[list[DocumentSettings]], nproc: int
+    ) -> None:
+        """Write documents on worker processes.
+
+        Each worker writes Typst sources of a group of documents,
+        and parent merges images, packages, build records, fragments and timings
+        from worker.
+        """
+
+        def write_process(group: list[DocumentSettings]):
+            self.timings.records = []
+            if self.node_profile is not None:
+                self.node_profile.stats = {}
+            self.write_doc_group(group)
+            records = {
+                d["filename"]: self._build_info.documents[d["filename"]] for d in group
+            }
+            return (
+                self.images,
+                self.packages,
+                records,
+                self.fragments.updated,
+                self.timings.records,
+                self.node_profile and self.node_profile.stats,
+            )
+
+        def merge(group: list[DocumentSettings], result) -> None:
+            images, registry, records, fragments, timings, node_stats = result
+            self.images.update(images)
+            self._merge_packages(registry)
+            self._build_info.documents.update(records)
+            self.fragments.merge(fragments)
+            self.timings.records.extend(timings)
+            if self.node_profile is not None:
+                self.node_profile.merge(node_stats)
+            self.on_group_written(group)
+
+        tasks = ParallelTasks(nproc)
+        for group in groups:
+            tasks.add_task(write_process, group, merge)
+        tasks.join()
+
+    def on_group_written(self, group: list[DocumentSettings]) -> None:
+        """Handle documents that are written.
+
+        It is called on main process for each groups of documents
+        as soon as they are written (and merged from worker process).
+        """
+
+    def _merge_packages(self, registry: packages.PackageRegistry) -> None:
+        for name, entrypoints in registry.items():
+            self.packages.setdefault(name, set()).update(entrypoints)
 
     def write_doc(self, document_settings: DocumentSettings):  # noqa: D102
-        docname = document_settings["entrypoint"]
+        self.write_doc_group([document_settings])
+
+    def write_doc_group(self, group: list[DocumentSettings]):
+        """Write documents that have same entrypoint, ``toctree_only`` and docnames.
+
+        It assembles and translates doctree once,
+        and renders translated body for each documents (themes and settings).
+        """
+        built_at = time.time_ns() // 1_000
+        docname = group[0]["entrypoint"]
+        self.excluded_docnames = self.get_excluded_docnames(group[0])
+        with self.timings.document(group[0]["filename"]):
+            doctree = self.assemble_doctree(docname, group[0]["toctree_only"])
+            visitor: writer.TypstTranslator = self.create_translator(doctree, self)  # type: ignore[assignment]
+            with self.timings.measure("translate"):
+                doctree.walkabout(visitor)
+        docnames = [docname] + visitor.included_docnames
+        index = ""
+        if self.config.typst_index_mode == "python" and visitor.context["has_index"]:
+            # Body of entrypoint is not written when toctree_only is set,
+            # so labels of its index entries do not exist.
+            index_docnames = (
+                visitor.included_docnames if group[0]["toctree_only"] else docnames
+            )
+            with self.timings.measure("index"):
+                index = indexing.render_index(
+                    indexing.create_index(self.env, index_docnames)
+                )
+            package = writer._typst_local_package_fullname("atsphinx-typst")
+            visitor.packages.add(package, "index-group")
+            visitor.packages.add(package, "index-entry")
+        self._merge_packages(visitor.packages)
+        chapters = []
+        if self.config.typst_split_output:
+            with self.timings.measure("write_chapters"):
+                chapters = self.write_chapters(visitor.chapters)
+        body = theming.Body(visitor.body)
+        for document_settings in group:
+            with self.timings.document(document_settings["filename"]):
+                self._render_doc(
+                    document_settings,
+                    theming.ThemeContext(
+                        project=self.app.config.project,
+                        release=self.app.config.release,
+                        copyright=self.app.config.copyright,
+                        # TODO: Support user custm format.
+                        build_date=self._build_date.strftime("%Y-%m-%d"),
+                        title=document_settings["title"],
+                        author=document_settings["author"],
+                        edition=document_settings["edition"],
+                        font=document_settings["font"],
+                        body=body,
+                        # Copy because theme adds own packages.
+                        packages=packages.PackageRegistry(
+                            {k: set(v) for k, v in visitor.packages.items()}
+                        ),
+                        translated=visitor.context,
+                        index=index,
+                        draft=self.config.typst_draft_mode,
+                    ),
+                )
+            self._build_info.documents[document_settings["filename"]] = (
+                caching.DocumentRecord(
+                    fingerprint=self.compute_fingerprint(document_settings),
+                    docnames=docnames,
+                    built_at=built_at,
+                    chapters=chapters,
+                )
+            )
+
+    def get_chapter_path(self, docname: str, state_key: Any) -> str:
+        """Retrieve path of split file for docname (relative from output directory).
+
+        Path has digest of translator state
+        because content of docname is different by section level of parent.
+        """
+        digest = caching.compute_digest(state_key)[:8]
+        return f"{CHAPTERS_DIR}/{docname}-{digest}.typ"
+
+    def write_chapters(self, chapters: dict[str, str]) -> list[str]:
+        """Write split files of document.
+
+        Files that have same content are not written again
+        to keep mtime for tools watching changes.
+
+        :param chapters: Content for each paths.
+        :returns: Paths of split files.
+        """
+        written = 0
+        for path, content in chapters.items():
+            out = Path(self.outdir) / path
+            if out.exists() and out.read_text(encoding="utf8") == content:
+                continue
+            out.parent.mkdir(parents=True, exist_ok=True)
+            out.write_text(content, encoding="utf8")
+            written += 1
+        logger.info("Wrote %d of %d split files.", written, len(chapters))
+        return list(chapters)
+
+    def _remove_stale_chapters(self):
+        base_dir = Path(self.outdir) / CHAPTERS_DIR
+        if not base_dir.is_dir():
+            return
+        expected = {
+            Path(self.outdir) / p
+            for record in self._build_info.documents.values()
+            for p in record.chapters
+        }
+        for path in base_dir.rglob("*.typ"):
+            if path not in expected:
+                path.unlink()
+
+    def _render_doc(
+        self, document_settings: DocumentSettings, context: theming.ThemeContext
+    ):
         theme = self._themes[document_settings["theme"]]
-        doctree = self.assemble_doctree(docname, document_settings["toctree_only"])
-        visitor: writer.TypstTranslator = self.create_translator(doctree, self)  # type: ignore[assignment]
-        doctree.walkabout(visitor)
-        context = theming.ThemeContext(
-            project=self.app.config.project,
-            release=self.app.config.release,
-            copyright=self.app.config.copyright,
-            # TODO: Support user custm format.
-            build_date=self._build_date.strftime("%Y-%m-%d"),
-            title=document_settings["title"],
-            author=document_settings["author"],
-            edition=document_settings["edition"],
-            font=document_settings["font"],
-            body="".join(visitor.body),
-            packages=visitor.packages,
-            translated=visitor.context,
-        )
         out = Path(self.app.outdir) / f"{document_settings['filename']}.typ"
-        theme.write_doc(out, context)
+        with self.timings.measure("render"):
+            theme.write_doc(out, context)
+        self._merge_packages(context.packages)
 
     def assemble_doctree(
         self, docname: str, toctree_only: bool | config.TOCTREE_ONLY_LITERAL
@@ -102,52 +511,176 @@ class TypstBuilder(Builder):
 
            We must see how does inline_all_toctrees work.
         """
-        root = self.env.get_doctree(docname)
-        if toctree_only:
-            root_section = nodes.section()
-            for toctree in root.findall(addnodes.toctree):
-                if toctree_only == "exclude_hidden" and toctree["hidden"]:
-                    continue
-                root_section += toctree
-            root = root.copy()
-            root += root_section
-        tree = inline_all_toctrees(self, {docname}, docname, root, darkgreen, [docname])
-        self.env.resolve_references(tree, docname, self)
+        with self.timings.measure("assemble_doctree"):
+            root = self.env.get_doctree(docname)
+            if toctree_only:
+                root_section = nodes.section()
+                for toctree in root.findall(addnodes.toctree):
+                    if toctree_only == "exclude_hidden" and toctree["hidden"]:
+                        continue
+                    root_section += toctree
+                root = root.copy()
+                root += root_section
+            if self.config.typst_stream_assembly:
+                # Children are loaded while translating (see load_stream_doctree).
+                tree = root
+            else:
+                # Excluded docnames are treated as traversed to skip them.
+                traversed = [docname, *sorted(self.excluded_docnames)]
+                tree = inline_all_toctrees(
+                    self, {docname}, docname, root, darkgreen, traversed
+                )
+        with self.timings.measure("resolve_references"):
+            self.env.resolve_references(tree, docname, self)
         return tree
 
+    def load_stream_doctree(self, node: addnodes.start_of_file):
+        """Load and resolve doctree of docname into node for streaming assembly.
+
+        Translator releases it after translating,
+        so builder holds only doctrees of docnames that are being translated.
+        """
+        docname = node["docname"]
+        with self.timings.measure("assemble_doctree"):
+            try:
+                tree = self.env.get_doctree(docname)
+            except Exception:
+                logger.warning(
+                    __("toctree contains ref to nonexisting file %r"), docname
+                )
+                return
+            # Drop serialized doctree that environment caches.
+            getattr(self.env, "_pickled_doctree_cache", {}).pop(docname, None)
+            logger.info(darkgreen(docname))
+        with self.timings.measure("resolve_references"):
+            self.env.resolve_references(tree, docname, self)
+        for section in tree.findall(nodes.section):
+            section.setdefault("docname", docname)
+        node.extend(tree.children)
+
     def get_target_uri(self, docname, typ=None):  # noqa: D102
         # TODO: Implement it!
-        return ""
+        # Keep docname for excluded docnames
+        # because translator does not write links to them (see visit_reference).
+        return docname if docname in self.excluded_docnames else ""
+
+    def copy_assets(self):
+        """Sync theme assets and static assets into output directory.
+
+        It copies only changed files and removes stale files.
+        """
+
+        def _sync(label: str, files: dict[Path, Path], dest: Path):
+            result = assets.sync_files(files, dest)
+            logger.info(
+                "Synced %s: %d copied, %d removed, %d files.",
+                label,
+                len(result.copied),
+                len(result.removed),
+                result.total,
+            )
 
-    def copy_assets(self):  # noqa: D102
         # Copying all theme assets.
         def _copy_theme_assets():
-            base_dir = self.app.outdir / "_themes"
+            base_dir = Path(self.app.outdir) / "_themes"
+            files: dict[Path, Path] = {}
             for name, theme in self._themes.items():
-                assets_outdir = base_dir / name
-                assets_srcdir = theme.get_theme_dir() / "assets"
-                copy_asset(
-                    assets_srcdir,
-                    assets_outdir,
+                files |= assets.collect_files(
+                    theme.get_theme_dir() / "assets", base_dir / name
                 )
+            _sync("theme assets", files, base_dir)
 
         def _copy_static_assets():
+            files: dict[Path, Path] = {}
             for entry in self.config.typst_static_path:
-                copy_asset(
-                    entry,
-                    self._static_dir,
-                )
+                files |= assets.collect_files(Path(entry), self._static_dir)
+            _sync("static assets", files, self._static_dir)
 
-        _copy_theme_assets()
-        _copy_static_assets()
+        with self.timings.measure("copy_assets"):
+            _copy_theme_assets()
+            _copy_static_assets()
 
-    def finish(self):  # noqa: D102
-        def _copy_images():
-            for src, dest in self.images.items():
-                dest.parent.mkdir(parents=True, exist_ok=True)
-                copy_asset_file(src, dest)
+    def register_image(self, src: Path) -> Path:
+        """Register image to put into output directory.
+
+        :param src: Source path of image.
+        :returns: Output path of image.
+        """
+        if src not in self.images:
+            dest = self._images_dir / src.relative_to(self.app.srcdir)
+            if self.config.typst_image_optimization is not None:
+                dest = dest.with_suffix(imaging.resolve_suffix(dest.suffix))
+            self.images[src] = dest
+        return self.images[src]
+
+    def optimize_images(
+        self, images: dict[Path, Path] | None = None
+    ) -> list[tuple[Path, Path]]:
+        """Optimize registered images on thread pool.
+
+        :param images: Images to optimize. All registered images by default.
+        :returns: Pairs of optimized (or cached) image path and output path.
+        """
+        settings = self.config.typst_image_optimization
+        cache_dir = Path(self.doctreedir) / "typst-images"
+        shared = self.shared_cache
 
-        _copy_images()
+        def _optimize(src: Path) -> Path:
+            if shared is None or src.suffix.lower() in imaging.VECTOR_SUFFIXES:
+                return imaging.optimize_image(src, settings, cache_dir)
+            name = imaging.get_cache_name(src, settings)
+            if not (cache_dir / name).exists():
+                shared.fetch("images", name, cache_dir / name)
+            optimized = imaging.optimize_image(src, settings, cache_dir)
+            if optimized != src:
+                shared.store("images", name, optimized)
+            return optimized
+
+        targets = sorted((self.images if images is None else images).items())
+        with ThreadPoolExecutor() as executor:
+            optimized = list(executor.map(_optimize, [src for src, _ in targets]))
+        return list(zip(optimized, [dest for _, dest in targets]))
+
+    def copy_images(self, images: dict[Path, Path] | None = None):
+        """Copy (or optimize) registered images into output directory.
+
+        :param images: Images to copy. All registered images by default.
+        """
+        if images is None:
+            images = self.images
+        # Sphinx already warns missing images while reading.
+        images = {k: v for k, v in sorted(images.items()) if k.is_file()}
+        if self.config.typst_image_optimization is not None:
+            with self.timings.measure("optimize_images"):
+                images = self.optimize_images(images)
+        with self.timings.measure("copy_images"):
+            copied = assets.copy_files(images, mode=self.config.typst_image_copy_mode)
+        logger.info("Copied %d of %d images.", len(copied), len(images))
+
+    def report_timings(self):
+        """Write timing report into output directory and log summary of it."""
+        self.timings.dump(Path(self.outdir) / profiling.TIMINGS_FILENAME)
+        logger.info(bold("Elapsed time of phases:"))
+        for phase, seconds in self.timings.summarize().items():
+            logger.info("  %-20s %8.3fs", phase, seconds)
+        if self.node_profile is not None and self.node_profile.stats:
+            self.node_profile.dump(Path(self.outdir) / profiling.NODE_PROFILE_FILENAME)
+            logger.info(bold("Translator profile (ranked by elapsed time):"))
+            logger.info(self.node_profile.format_table(limit=30))
+
+    def evict_shared_cache(self):
+        """Remove least-recently-used entries of shared cache over size limit."""
+        if self.shared_cache is None:
+            return
+        with self.timings.measure("evict_cache"):
+            removed = self.shared_cache.evict()
+        if removed:
+            logger.info("Removed %d entries from shared cache.", removed)
+
+    def finish(self):  # noqa: D102
+        self.copy_images()
+        self.evict_shared_cache()
+        self.report_timings()
 
 
 class TypstPDFBuilder(TypstBuilder):
@@ -167,17 +700,490 @@ class TypstPDFBuilder(TypstBuilder):
         except ImportError:
             raise SphinxError("Require 'typst' to run 'typstpdf' builder.")
         super().init()
+        self._executor: ProcessPoolExecutor | None = None
+        """Process pool to compile documents while writing others."""
+        self._pipeline: dict[str, Future] = {}
+        self._pipelined_images: set[Path] = set()
 
-    def finish(self):  # noqa: D102
-        import typst
+    def get_outdated_docs(self):
+        """Find docnames that are included in outdated documents.
+
+        In addition to Typst sources, entrypoint is outdated
+        when PDF does not exist or inputs for compiling are changed.
+        """
+        outdated = set(super().get_outdated_docs())
+        inputs_digest = self.compute_compile_inputs_digest()
+        for document_settings in self.config.typst_documents:
+            if not self.is_compiled(document_settings, inputs_digest):
+                outdated.add(document_settings["entrypoint"])
+        return sorted(outdated)
+
+    def compute_compile_inputs_digest(self, font_contents: bool = False) -> str:
+        """Calculate digest of inputs to compile Typst sources except themselves.
+
+        Inputs are copied assets in output directory, bundled Typst packages,
+        stat of font files and versions of packages.
+
+        :param font_contents: Use contents of font files instead of stat.
+        """
+        font_paths = [Path(p) for p in self.config.typst_font_paths]
+        return caching.compute_digest(
+            [
+                metadata.version(name)
+                for name in ("atsphinx-typst", "rst2typst", "typst")
+            ],
+            caching.hash_files(
+                self._images_dir,
+                self._static_dir,
+                Path(self.outdir) / "_themes",
+                typst_package_dir,
+                rst2typst_package_dir,
+            ),
+            caching.hash_files(*font_paths)
+            if font_contents
+            else caching.stat_files(*font_paths),
+        )
+
+    def compute_compile_digest(
+        self, document_settings: DocumentSettings, inputs_digest: str
+    ) -> str:
+        """Calculate digest of all inputs to compile a document."""
+        src = Path(self.outdir) / f"{document_settings['filename']}.typ"
+        record = self._build_info.documents.get(document_settings["filename"])
+        chapters = [Path(self.outdir) / p for p in record.chapters] if record else []
+        return caching.compute_digest(
+            inputs_digest,
+            caching.hash_files(src, *chapters),
+            document_settings["formats"],
+        )
+
+    def is_compiled(
+        self, document_settings: DocumentSettings, inputs_digest: str
+    ) -> bool:
+        """Check that PDF (and pages) exist and it is compiled from current inputs."""
+        filename = document_settings["filename"]
+        if not (Path(self.outdir) / f"{filename}.pdf").exists():
+            return False
+        pages = self._build_info.pages.get(filename, [])
+        if not all((Path(self.outdir) / p).exists() for p in pages):
+            return False
+        digest = self.compute_compile_digest(document_settings, inputs_digest)
+        return self._build_info.compiled.get(filename) == digest
+
+    def compute_shared_compile_key(
+        self, document_settings: DocumentSettings, shared_inputs_digest: str
+    ) -> str:
+        """Calculate key of PDF in shared cache.
 
-        super().finish()
-        install_package(rst2typst_package_dir, "rst2typst")
-        install_package(typst_package_dir, "atsphinx-typst")
-        kwargs = {}
+        It uses contents of all inputs (including fonts and vendored packages)
+        because stat of files are different for each build hosts.
+        """
+        cache_dir = self.config.typst_package_cache_dir
+        return caching.compute_digest(
+            self.compute_compile_digest(document_settings, shared_inputs_digest),
+            caching.hash_files(cache_dir) if cache_dir else None,
+            self._build_timestamp,
+        )
+
+    def get_package_path(self) -> Path | None:
+        """Retrieve directory of local packages for this build.
+
+        It is ``None`` (user data directory)
+        unless :confval:`typst_isolate_packages` is set.
+        """
+        if not self.config.typst_isolate_packages:
+            return None
+        return Path(self.outdir) / "_packages"
+
+    def verify_vendored_packages(self, sources: list[Path]):
+        """Check that all ``@preview`` packages for sources are vendored.
+
+        Compiler does not download packages
+        when :confval:`typst_package_cache_dir` is set.
+        """
+        cache_dir = self.config.typst_package_cache_dir
+        specs = vendoring.find_packages(
+            *sources,
+            *[p for t in self._themes.values() for p in t.get_theme_dirs()],
+            self._static_dir,
+            typst_package_dir,
+            rst2typst_package_dir,
+        )
+        missing = vendoring.find_missing(cache_dir, specs)
+        if missing:
+            names = ", ".join(f"@preview/{n}:{v}" for n, v in sorted(missing))
+            raise SphinxError(
+                f"Packages are not vendored in {cache_dir}: {names}\n"
+                "Run 'python -m atsphinx.typst.vendoring "
+                f"-o {cache_dir} {self.outdir}' to vendor them."
+            )
+
+    def install_packages(self):
+        """Install bundled Typst packages for compiling."""
+        package_path = self.get_package_path()
+        with self.timings.measure("install_package"):
+            packages.install_package(
+                rst2typst_package_dir, "rst2typst", package_path=package_path
+            )
+            packages.install_package(
+                typst_package_dir, "atsphinx-typst", package_path=package_path
+            )
+
+    def get_compile_kwargs(self) -> dict[str, Any]:
+        """Retrieve keyword arguments for :func:`get_compiler`."""
+        kwargs: dict[str, Any] = {}
         if self.config.typst_font_paths:
             kwargs["font_paths"] = self.config.typst_font_paths
+        package_path = self.get_package_path()
+        if package_path is not None:
+            kwargs["package_path"] = package_path
+        if self.config.typst_package_cache_dir is not None:
+            kwargs["package_cache_path"] = self.config.typst_package_cache_dir
+        return kwargs
+
+    def write_documents(self, docnames):  # noqa: D102
+        if self.config.typst_pipeline_compile:
+            self.start_pipeline()
+        super().write_documents(docnames)
+
+    def start_pipeline(self):
+        """Start process pool to compile documents while writing others.
+
+        Packages are installed before writing
+        because workers compile documents before :meth:`finish`.
+        """
+        self.install_packages()
+        workers = self.config.typst_compile_workers or self.app.parallel
+        # NOTE: Forked workers deadlock when typst has already run in parent process.
+        self._executor = ProcessPoolExecutor(
+            max_workers=max(workers, 1),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self._pipeline = {}
+        self._pipelined_images = set()
+
+    def on_group_written(self, group: list[DocumentSettings]) -> None:
+        """Start compiling written documents on background (only in pipeline mode).
+
+        Images that are registered until now are copied before compiling.
+        """
+        if self._executor is None:
+            return
+        images = {
+            k: v for k, v in self.images.items() if k not in self._pipelined_images
+        }
+        self.copy_images(images)
+        self._pipelined_images.update(images)
+        for document_settings in group:
+            filename = document_settings["filename"]
+            src = Path(self.app.outdir) / f"{filename}.typ"
+            out = Path(self.app.outdir) / f"{filename}.pdf"
+            if self.config.typst_package_cache_dir is not None:
+                self.verify_vendored_packages([src])
+            logger.info("Start compiling '%s' on background.", filename)
+            self._pipeline[filename] = self._executor.submit(
+                _compile_document_timed,
+                src,
+                out,
+                self.get_compile_kwargs(),
+                self._build_timestamp,
+                document_settings["formats"],
+            )
+
+    def wait_pipeline(self) -> dict[str, str | None]:
+        """Wait for documents that are compiled on background.
+
+        :returns: Error message (``None`` when it succeeded) for each output filenames.
+        """
+        results: dict[str, str | None] = {}
+        if self._executor is None:
+            return results
+        with self.timings.measure("compile_wait"):
+            for filename, future in self._pipeline.items():
+                try:
+                    error, pages, seconds = future.result()
+                    self.timings.add("compile", seconds, filename)
+                    self._build_info.pages[filename] = pages
+                except Exception as err:
+                    error = str(err)
+                results[filename] = error
+        self._executor.shutdown()
+        self._executor = None
+        self._pipeline = {}
+        self._pipelined_images = set()
+        return results
+
+    def compile_documents(
+        self,
+        targets: list[tuple[str, Path, Path]],
+        kwargs: dict[str, Any],
+        timestamp: int | None = None,
+    ) -> dict[str, str]:
+        """Compile Typst sources into PDF.
+
+        When workers are more than 1, it compiles sources on process pool.
+        Failure of a document does not stop compiling others.
+
+        :param targets: List of output filename, source path and output path.
+        :param kwargs: Keyword arguments for :func:`get_compiler`.
+        :param timestamp: Timestamp to write into PDF for reproducible build.
+        :returns: Error messages for each failed output filenames.
+        """
+        workers = self.config.typst_compile_workers or self.app.parallel
+        errors: dict[str, str] = {}
+        formats = {d["filename"]: d["formats"] for d in self.config.typst_documents}
+        if workers <= 1 or len(targets) <= 1:
+            for filename, src, out in targets:
+                try:
+                    error, pages, seconds = _compile_document_timed(
+                        src, out, kwargs, timestamp, formats.get(filename)
+                    )
+                    self.timings.add("compile", seconds, filename)
+                    self._build_info.pages[filename] = pages
+                except Exception as err:
+                    error = str(err)
+                if error is not None:
+                    errors[filename] = error
+            return errors
+
+        # NOTE: Forked workers deadlock when typst has already run in parent process.
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(targets)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            futures = {
+                executor.submit(
+                    _compile_document_timed,
+                    src,
+                    out,
+                    kwargs,
+                    timestamp,
+                    formats.get(filename),
+                ): filename
+                for filename, src, out in targets
+            }
+            for future in as_completed(futures):
+                try:
+                    error, pages, seconds = future.result()
+                    self.timings.add("compile", seconds, futures[future])
+                    self._build_info.pages[futures[future]] = pages
+                except Exception as err:
+                    error = str(err)
+                if error is not None:
+                    errors[futures[future]] = error
+        return errors
+
+    def collect_compile_targets(
+        self, compiled: dict[str, str | None] | None = None
+    ) -> tuple[list[tuple[str, Path, Path]], dict[str, str], dict[str, str]]:
+        """Find documents that must be compiled.
+
+        When :confval:`typst_cache_dir` is set,
+        PDF compiled from same inputs by other builds is copied from shared cache.
+        Documents that have additional formats do not use shared cache
+        because it stores only PDF.
+
+        :param compiled: Documents that are already compiled while writing.
+                         They are not targets, but their digests are returned.
+        :returns: Targets for :meth:`compile_documents`,
+                  digests of compile inputs and keys in shared cache
+                  for each output filenames.
+        """
+        inputs_digest = self.compute_compile_inputs_digest()
+        shared_inputs_digest = None
+        if self.shared_cache is not None:
+            shared_inputs_digest = self.compute_compile_inputs_digest(
+                font_contents=True
+            )
+        targets = []
+        digests = {}
+        shared_keys = {}
+        compiled = compiled or {}
         for document_settings in self.config.typst_documents:
-            src = Path(self.app.outdir) / f"{document_settings['filename']}.typ"
-            out = Path(self.app.outdir) / f"{document_settings['filename']}.pdf"
-            typst.compile(src, output=out, **kwargs)
+            filename = document_settings["filename"]
+            src = Path(self.app.outdir) / f"{filename}.typ"
+            out = Path(self.app.outdir) / f"{filename}.pdf"
+            pipelined = filename in compiled
+            if not pipelined and self.is_compiled(document_settings, inputs_digest):
+                logger.info("Skip compiling '%s' because it is up to date.", filename)
+                continue
+            digest = self.compute_compile_digest(document_settings, inputs_digest)
+            use_shared = not document_settings["formats"]
+            if self.shared_cache and shared_inputs_digest and use_shared:
+                key = self.compute_shared_compile_key(
+                    document_settings, shared_inputs_digest
+                )
+                if not pipelined and self.shared_cache.fetch("pdf", key, out):
+                    logger.info("Reuse '%s' from shared cache.", filename)
+                    self._build_info.compiled[filename] = digest
+                    self._build_info.pages.pop(filename, None)
+                    continue
+                shared_keys[filename] = key
+            digests[filename] = digest
+            if not pipelined:
+                targets.append((filename, src, out))
+        return targets, digests, shared_keys
+
+    def finish(self):  # noqa: D102
+        # Discover fonts again for each build because font files may be changed.
+        _compilers.clear()
+        self.copy_images(
+            {k: v for k, v in self.images.items() if k not in self._pipelined_images}
+        )
+        self.install_packages()
+        pipelined = self.wait_pipeline()
+        targets, digests, shared_keys = self.collect_compile_targets(pipelined)
+        if targets and self.config.typst_package_cache_dir is not None:
+            self.verify_vendored_packages([src for _, src, _ in targets])
+        with self.timings.measure("compile_total"):
+            errors = self.compile_documents(
+                targets, self.get_compile_kwargs(), timestamp=self._build_timestamp
+            )
+        errors |= {k: v for k, v in pipelined.items() if v is not None}
+        for filename, digest in digests.items():
+            if filename in errors:
+                self._build_info.compiled.pop(filename, None)
+            else:
+                self._build_info.compiled[filename] = digest
+        for filename, key in shared_keys.items():
+            if self.shared_cache is not None and filename not in errors:
+                out = Path(self.app.outdir) / f"{filename}.pdf"
+                self.shared_cache.store("pdf", key, out)
+        self._build_info.dump()
+        self.evict_shared_cache()
+        self.report_timings()
+        if errors:
+            messages = [f"{filename}: {msg}" for filename, msg in errors.items()]
+            raise SphinxError(
+                "Failed to compile %d document(s).\n%s"
+                % (len(errors), "\n".join(messages))
+            )
+
+
+_compilers: dict[tuple[str, tuple[str, ...], str, str], Any] = {}
+"""Compilers that are created in this process."""
+
+
+def get_compiler(
+    root: Path,
+    font_paths: list[str | Path] | None = None,
+    package_path: Path | None = None,
+    package_cache_path: Path | None = None,
+):
+    """Retrieve long-lived Typst compiler for this process.
+
+    Compiler is created once for each root and font paths,
+    so fonts are discovered only once even if it compiles many documents.
+
+    :param root: Root directory of Typst project.
+    :param font_paths: Additional directories of fonts.
+    :param package_path: Directory of local packages instead of user data directory.
+    :param package_cache_path: Directory of downloaded packages instead of user cache.
+    """
+    import typst
+
+    font_paths = list(font_paths or [])
+    key = (
+        str(root),
+        tuple(str(p) for p in font_paths),
+        str(package_path),
+        str(package_cache_path),
+    )
+    if key not in _compilers:
+        fonts = typst.Fonts(font_paths=font_paths)
+        _compilers[key] = typst.Compiler(
+            root=root,
+            font_paths=fonts,
+            package_path=str(package_path) if package_path else None,
+            package_cache_path=str(package_cache_path) if package_cache_path else None,
+        )
+    return _compilers[key]
+
+
+def parse_page_ranges(spec: str | None, total: int) -> list[int]:
+    """Parse page ranges into page numbers.
+
+    :param spec: Comma separated page numbers or ranges (e.g. ``"1-3,5,8-"``).
+                 All pages when it is ``None`` or empty.
+    :param total: Number of pages in document.
+    :returns: Sorted page numbers (1-based) that exist in document.
+    """
+    if not spec:
+        return list(range(1, total + 1))
+    numbers: set[int] = set()
+    for part in spec.split(","):
+        start, sep, end = part.strip().partition("-")
+        first = int(start) if start else 1
+        last = (int(end) if end else total) if sep else first
+        numbers.update(range(max(first, 1), min(last, total) + 1))
+    return sorted(numbers)
+
+
+def export_pages(
+    compiler, src: Path, out: Path, settings: OutputFormatSettings
+) -> list[Path]:
+    """Write pages of document as PNG or SVG files.
+
+    Compiler reuses memoized result of previous compilation for same source,
+    so it does not lay out document again.
+    Encoded pages are written on thread pool.
+
+    :param compiler: Compiler that compiled source.
+    :param src: Typst source.
+    :param out: Path of PDF. Pages are written as ``{stem}-{page}.{format}`` next to it.
+    :param settings: Settings of output format.
+    :returns: Paths of written pages.
+    """
+    fmt = settings["format"]
+    options = {"ppi": settings["ppi"]} if settings["ppi"] else {}
+    pages = compiler.compile(input=src, format=fmt, **options)
+    if isinstance(pages, bytes):
+        pages = [pages]
+    numbers = parse_page_ranges(settings["pages"], len(pages))
+    paths = [out.with_name(f"{out.stem}-{n}.{fmt}") for n in numbers]
+    with ThreadPoolExecutor() as executor:
+        list(executor.map(Path.write_bytes, paths, [pages[n - 1] for n in numbers]))
+    return paths
+
+
+def _compile_document(
+    src: Path,
+    out: Path,
+    kwargs: dict[str, Any],
+    timestamp: int | None = None,
+    formats: list[OutputFormatSettings] | None = None,
+) -> tuple[str | None, list[str]]:
+    """Compile a Typst source into PDF (and additional formats).
+
+    This is module-level function to run on process pool.
+    It returns error message instead of raising
+    because exceptions of typst are not always picklable.
+
+    :returns: Error message and paths of written pages (relative from PDF directory).
+    """
+    import typst
+
+    pages: list[str] = []
+    try:
+        options = {} if timestamp is None else {"timestamp": timestamp}
+        compiler = get_compiler(src.parent, **kwargs)
+        compiler.compile(input=src, output=out, **options)
+        for settings in formats or []:
+            paths = export_pages(compiler, src, out, settings)
+            pages += [p.relative_to(out.parent).as_posix() for p in paths]
+    except typst.TypstError as err:
+        return str(err), pages
+    return None, pages
+
+
+def _compile_document_timed(
+    src: Path,
+    out: Path,
+    kwargs: dict[str, Any],
+    timestamp: int | None = None,
+    formats: list[OutputFormatSettings] | None = None,
+) -> tuple[str | None, list[str], float]:
+    """Compile a Typst source and measure elapsed time in worker."""
+    start = time.perf_counter()
+    error, pages = _compile_document(src, out, kwargs, timestamp, formats)
+    return error, pages, time.perf_counter() - start
@@ -0,0 +1,409 @@
+"""Caching helpers for incremental builds.
+
+Builders record what they wrote into a small JSON file in the output directory,
+and compare it on next build to skip works for outputs that are up to date.
+When :confval:`typst_cache_dir` is set, builders also share translated fragments,
+optimized images and PDFs through content-addressed directory across builds.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import types
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from rst2typst.package import Entrypoint
+
+from .packages import PackageRegistry
+
+if TYPE_CHECKING:
+    from typing import Any
+
+BUILD_INFO_FILENAME = ".typstinfo.json"
+"""Filename of build information in output directory."""
+
+FRAGMENTS_FILENAME = "typst-fragments.pickle"
+"""Filename of translated fragments in doctree directory."""
+
+BUILD_INFO_VERSION = 1
+"""Format version of build information.
+
+When it is changed, stored build information is discarded.
+"""
+
+
+def _serialize(obj: Any) -> Any:
+    if isinstance(obj, (set, frozenset)):
+        return sorted(_serialize(v) for v in obj)
+    if isinstance(obj, (type, types.FunctionType)):
+        # Default repr of functions includes the ID, so it is not stable.
+        return f"{obj.__module__}.{obj.__qualname__}"
+    if isinstance(obj, (types.MethodType, types.BuiltinFunctionType)):
+        return f"{obj.__module__}.{obj.__qualname__}"
+    cls = type(obj)
+    if cls.__str__ is object.__str__ and cls.__repr__ is object.__repr__:
+        # Default repr of objects also includes the ID.
+        # Use only class name because it does not have stable representation.
+        return f"<{cls.__module__}.{cls.__qualname__}>"
+    return str(obj)
+
+
+def compute_digest(*values: Any) -> str:
+    """Calculate stable digest from JSON serializable values."""
+    source = json.dumps(values, sort_keys=True, default=_serialize, ensure_ascii=False)
+    return hashlib.sha256(source.encode("utf8")).hexdigest()
+
+
+def stat_files(*dirs: Path) -> list[tuple[str, int, int]]:
+    """Collect path, size and mtime of all files in directories.
+
+    It is lightweight fingerprint source for resources
+    that are not managed by Sphinx environment (themes, templates and more).
+    """
+    stats = []
+    for base in dirs:
+        if not base.is_dir():
+            continue
+        for path in sorted(base.rglob("*")):
+            if not path.is_file():
+                continue
+            st = path.stat()
+            stats.append((str(path), st.st_size, st.st_mtime_ns))
+    return stats
+
+
+def hash_content(path: Path) -> str:
+    """Calculate digest from content of a file."""
+    digest = hashlib.sha256()
+    with path.open("rb") as fp:
+        for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_files(*paths: Path) -> str:
+    """Calculate digest from contents of files.
+
+    When path is directory, it reads all files in it recursively.
+    Missing paths are skipped.
+    Paths of files are hashed as relative from directory (or only name for file),
+    so digest does not depend on location of directories.
+    """
+    digest = hashlib.sha256()
+    for base in paths:
+        targets = sorted(base.rglob("*")) if base.is_dir() else [base]
+        for path in targets:
+            if not path.is_file():
+                continue
+            name = path.relative_to(base) if base.is_dir() else path.name
+            digest.update(str(name).encode("utf8"))
+            with path.open("rb") as fp:
+                for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class DocumentRecord:
+    """Build record of a document written by builder."""
+
+    fingerprint: str
+    """Digest of settings, theme and configuration used for writing."""
+    docnames: list[str] = field(default_factory=list)
+    """Docnames that are included into document."""
+    built_at: int = 0
+    """Timestamp (microseconds) when builder started writing document.
+
+    This is same unit as ``BuildEnvironment.all_docs``.
+    """
+    chapters: list[str] = field(default_factory=list)
+    """Paths of split files that document includes (only in split output mode)."""
+
+
+class BuildInfo:
+    """Build information stored in output directory."""
+
+    def __init__(self, path: Path):  # noqa: D107
+        self.path = path
+        self.documents: dict[str, DocumentRecord] = {}
+        self.compiled: dict[str, str] = {}
+        """Digests of compile inputs for each output filename."""
+        self.pages: dict[str, list[str]] = {}
+        """Page files of additional formats for each output filename."""
+
+    @classmethod
+    def load(cls, path: Path) -> BuildInfo:
+        """Load build information from file.
+
+        When file does not exist or it is broken, this returns empty object.
+        """
+        obj = cls(path)
+        try:
+            data = json.loads(path.read_text(encoding="utf8"))
+        except (OSError, ValueError):
+            return obj
+        if not isinstance(data, dict) or data.get("version") != BUILD_INFO_VERSION:
+            return obj
+        obj.documents = {
+            name: DocumentRecord(**record)
+            for name, record in data.get("documents", {}).items()
+        }
+        obj.compiled = data.get("compiled", {})
+        obj.pages = data.get("pages", {})
+        return obj
+
+    def dump(self):
+        """Write build information into file."""
+        data = {
+            "version": BUILD_INFO_VERSION,
+            "documents": {
+                name: asdict(record) for name, record in self.documents.items()
+            },
+            "compiled": self.compiled,
+            "pages": self.pages,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(data, indent=2), encoding="utf8")
+
+
+@dataclass
+class Fragment:
+    """Translated Typst content of a docname."""
+
+    body: str
+    """Translated body."""
+    packages: PackageRegistry
+    """Packages that are used in body."""
+    images: dict[Path, Path]
+    """Images that are referred from body (source path to output path)."""
+    context: dict[str, Any]
+    """Translated state that is set while translating."""
+    chapters: dict[str, str] | None = None
+    """Content of split files in fragment (only in split output mode)."""
+
+    def dumps(self) -> bytes:
+        """Serialize as JSON.
+
+        Shared cache uses JSON instead of pickle
+        because other hosts can write into it.
+        """
+        data = {
+            "body": self.body,
+            "packages": {
+                name: sorted([e.name, e.alias] for e in entrypoints)
+                for name, entrypoints in self.packages.items()
+            },
+            "images": [[str(src), str(dest)] for src, dest in self.images.items()],
+            "context": self.context,
+            "chapters": self.chapters,
+        }
+        return json.dumps(data, ensure_ascii=False).encode("utf8")
+
+    @classmethod
+    def loads(cls, data: bytes) -> Fragment:
+        """Deserialize from JSON that is written by :meth:`dumps`."""
+        obj = json.loads(data.decode("utf8"))
+        chapters = obj["chapters"]
+        return cls(
+            body=str(obj["body"]),
+            packages=PackageRegistry(
+                {
+                    str(name): {
+                        Entrypoint(str(n), None if a is None else str(a))
+                        for n, a in values
+                    }
+                    for name, values in obj["packages"].items()
+                }
+            ),
+            images={Path(src): Path(dest) for src, dest in obj["images"]},
+            context=dict(obj["context"]),
+            chapters=None
+            if chapters is None
+            else {str(k): str(v) for k, v in chapters.items()},
+        )
+
+
+class FragmentCache:
+    """Store of translated fragments for each docnames.
+
+    Each docname has a source key (read time of docnames in it and configuration)
+    and fragments for each translator states (section level and indent).
+    When source key is changed, all fragments of docname are discarded.
+    """
+
+    def __init__(self, path: Path, shared: SharedCache | None = None):  # noqa: D107
+        self.path = path
+        self.shared = shared
+        """Shared cache to find fragments that other builds translated."""
+        self._entries: dict[str, tuple[str, dict[Any, Fragment]]] = {}
+        self.updated: dict[str, tuple[str, dict[Any, Fragment]]] = {}
+        """Entries that are updated in current process."""
+
+    @classmethod
+    def load(cls, path: Path, shared: SharedCache | None = None) -> FragmentCache:
+        """Load cache from file.
+
+        When file does not exist or it is broken, this returns empty object.
+        """
+        obj = cls(path, shared)
+        try:
+            with path.open("rb") as fp:
+                obj._entries = pickle.load(fp)
+        except Exception:
+            obj._entries = {}
+        return obj
+
+    def get(self, docname: str, source_key: str, state_key: Any) -> Fragment | None:
+        """Retrieve fragment if it is cached (in this cache or shared cache)."""
+        entry = self._entries.get(docname)
+        if entry is not None and entry[0] == source_key and state_key in entry[1]:
+            return entry[1][state_key]
+        if self.shared is None:
+            return None
+        data = self.shared.read(
+            "fragments", compute_digest(docname, source_key, state_key)
+        )
+        if data is None:
+            return None
+        try:
+            fragment = Fragment.loads(data)
+        except (ValueError, TypeError, KeyError, AttributeError):
+            return None
+        self._store(docname, source_key, state_key, fragment)
+        return fragment
+
+    def set(self, docname: str, source_key: str, state_key: Any, fragment: Fragment):
+        """Store fragment."""
+        self._store(docname, source_key, state_key, fragment)
+        if self.shared is None:
+            return
+        try:
+            data = fragment.dumps()
+        except TypeError:
+            # Context has value that is not JSON serializable.
+            return
+        key = compute_digest(docname, source_key, state_key)
+        self.shared.write("fragments", key, data)
+
+    def _store(self, docname: str, source_key: str, state_key: Any, fragment: Fragment):
+        entry = self._entries.get(docname)
+        if entry is None or entry[0] != source_key:
+            entry = (source_key, {})
+            self._entries[docname] = entry
+        entry[1][state_key] = fragment
+        self.updated[docname] = entry
+
+    def merge(self, entries: dict[str, tuple[str, dict[Any, Fragment]]]):
+        """Merge entries updated in other process."""
+        for docname, (source_key, fragments) in entries.items():
+            for state_key, fragment in fragments.items():
+                self._store(docname, source_key, state_key, fragment)
+
+    def dump(self, docnames: set[str]):
+        """Write cache into file.
+
+        :param docnames: Docnames that exist in project. Others are discarded.
+        """
+        entries = {k: v for k, v in self._entries.items() if k in docnames}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("wb") as fp:
+            pickle.dump(entries, fp, pickle.HIGHEST_PROTOCOL)
+
+
+class SharedCache:
+    """Content-addressed cache directory that builds share.
+
+    Directory may be on network filesystem that many build hosts mount.
+    Each entry is a file named by digest of its inputs in directory of its kind,
+    and it is written atomically (temporary file and rename),
+    so concurrent builds can read and write same directory.
+
+    Reading entry updates its mtime, and :meth:`evict` removes entries
+    in least-recently-used order while total size is over limit.
+    """
+
+    def __init__(self, path: Path, max_size: int):  # noqa: D107
+        self.path = path
+        self.max_size = max_size
+        """Max total size (bytes) of entries."""
+
+    def get_path(self, kind: str, key: str) -> Path:
+        """Retrieve path of entry."""
+        return self.path / kind / key[:2] / key
+
+    def _touch(self, path: Path) -> bool:
+        try:
+            os.utime(path)
+        except OSError:
+            return False
+        return True
+
+    def read(self, kind: str, key: str) -> bytes | None:
+        """Read content of entry if it exists."""
+        path = self.get_path(kind, key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        self._touch(path)
+        return data
+
+    def write(self, kind: str, key: str, data: bytes):
+        """Write content of entry."""
+        path = self.get_path(kind, key)
+        if self._touch(path):
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}-{uuid.uuid4().hex}.tmp")
+        try:
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def fetch(self, kind: str, key: str, dest: Path) -> bool:
+        """Copy entry into file.
+
+        :returns: ``True`` when entry exists.
+        """
+        data = self.read(kind, key)
+        if data is None:
+            return False
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        dest.write_bytes(data)
+        return True
+
+    def store(self, kind: str, key: str, src: Path):
+        """Copy file into entry."""
+        if not self._touch(self.get_path(kind, key)):
+            self.write(kind, key, src.read_bytes())
+
+    def evict(self) -> int:
+        """Remove least-recently-used entries while total size is over limit.
+
+        :returns: Number of removed entries.
+        """
+        entries = []
+        for path in self.path.glob("*/*/*"):
+            if path.name.startswith("."):
+                continue
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
@@ -5,6 +5,10 @@ from __future__ import annotations
 from pathlib import Path
 from typing import TYPE_CHECKING, Literal, TypedDict
 
+from sphinx.config import ENUM
+
+from .assets import COPY_MODES
+
 if TYPE_CHECKING:
     from sphinx.application import Sphinx
     from sphinx.config import Config
@@ -12,6 +16,12 @@ if TYPE_CHECKING:
 
 TOCTREE_ONLY_LITERAL = Literal["all", "exclude_hidden"]
 
+PATH_TYPES = [str, Path, type(Path())]
+"""Types of path values.
+
+Sphinx checks exact type of value, so it needs concrete class (e.g. ``PosixPath``).
+"""
+
 
 class DocumentSettings(TypedDict):
     """Build settings each documets."""
@@ -34,6 +44,42 @@ class DocumentSettings(TypedDict):
     """Default font name or family to use for building PDF."""
     toctree_only: bool | TOCTREE_ONLY_LITERAL
     """When it is ``True``, builder only write contents of toctree from 'entrypoint'."""
+    include_docnames: list[str] | None
+    """Patterns of docnames to write. Builder writes all docnames by default."""
+    formats: list[str | OutputFormatSettings]
+    """Additional output formats of ``typstpdf`` builder (PDF is always written)."""
+
+
+class OutputFormatSettings(TypedDict):
+    """Settings of additional output format of document."""
+
+    format: Literal["png", "svg"]
+    """Output format."""
+    pages: str | None
+    """Page ranges to write (e.g. ``"1-3,5"``). All pages by default."""
+    ppi: float | None
+    """Pixels per inch for PNG."""
+
+
+class ImageOptimizationSettings(TypedDict):
+    """Settings to optimize images for PDF."""
+
+    dpi: int
+    """Target resolution of images."""
+    page_width: float
+    """Width of page body (inches).
+
+    Images wider than ``dpi * page_width`` pixels are downsampled.
+    """
+    jpeg_quality: int
+    """Quality to recompress JPEG images."""
+
+
+DEFAULT_IMAGE_OPTIMIZATION_SETTINGS = {
+    "dpi": 150,
+    "page_width": 6.3,
+    "jpeg_quality": 85,
+}
 
 
 DEFAULT_DOCUMENT_SETTINGS = {
@@ -42,6 +88,13 @@ DEFAULT_DOCUMENT_SETTINGS = {
     "theme": "manual",
     "font": None,
     "toctree_only": False,
+    "include_docnames": None,
+    "formats": [],
+}
+
+DEFAULT_OUTPUT_FORMAT_SETTINGS = {
+    "pages": None,
+    "ppi": None,
 }
 
 
@@ -61,6 +114,13 @@ def compute_configurations(app: Sphinx, config: Config):
         )
     for idx, user_value in enumerate(document_settings):
         document_settings[idx] = DEFAULT_DOCUMENT_SETTINGS | user_value
+        document_settings[idx]["formats"] = [
+            DEFAULT_OUTPUT_FORMAT_SETTINGS
+            | (f if isinstance(f, dict) else {"format": f})
+            for f in document_settings[idx]["formats"]
+            # PDF is always written.
+            if f != "pdf"
+        ]
     config.typst_documents = document_settings
 
     # 2. Cast string path to Path object.
@@ -72,9 +132,39 @@ def compute_configurations(app: Sphinx, config: Config):
         typst_static_path.append(app.confdir / p)
     config.typst_static_path = typst_static_path
 
+    # 3. Resolve cache directories from configuration directory.
+    #    Wrap by Path because confdir is subclass of Path that Sphinx does not accept.
+    if config.typst_package_cache_dir is not None:
+        config.typst_package_cache_dir = Path(
+            app.confdir / config.typst_package_cache_dir
+        )
+    if config.typst_cache_dir is not None:
+        config.typst_cache_dir = Path(app.confdir / config.typst_cache_dir)
+
+    # 4. Inject default values of ``typst_image_optimization``.
+    if config.typst_image_optimization is not None:
+        config.typst_image_optimization = (
+            DEFAULT_IMAGE_OPTIMIZATION_SETTINGS | config.typst_image_optimization
+        )
+
 
 def setup(app: Sphinx):  # noqa: D103
     app.add_config_value("typst_documents", [], "env", list[dict])
     app.add_config_value("typst_static_path", [], "env", [list[str | Path]])
     app.add_config_value("typst_font_paths", [], "env", [list[str | Path]])
+    app.add_config_value("typst_compile_workers", 0, "", int)
+    app.add_config_value("typst_image_copy_mode", "copy", "", ENUM(*COPY_MODES))
+    app.add_config_value("typst_image_optimization", None, "env", [dict])
+    app.add_config_value("typst_profile_translator", False, "", bool)
+    app.add_config_value("typst_isolate_packages", False, "", bool)
+    app.add_config_value("typst_package_cache_dir", None, "", PATH_TYPES)
+    app.add_config_value("typst_index_mode", "typst", "env", ENUM("typst", "python"))
+    app.add_config_value("typst_stream_assembly", False, "env", bool)
+    app.add_config_value("typst_split_output", False, "env", bool)
+    app.add_config_value("typst_build_date", None, "env", [str])
+    app.add_config_value("typst_draft_mode", False, "", bool)
+    app.add_config_value("typst_include_docnames", [], "", list[str])
+    app.add_config_value("typst_pipeline_compile", False, "", bool)
+    app.add_config_value("typst_cache_dir", None, "", PATH_TYPES)
+    app.add_config_value("typst_cache_max_size", 1024**3, "", int)
     app.connect("config-inited", compute_configurations)
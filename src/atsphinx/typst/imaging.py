@@ -0,0 +1,105 @@
+"""Image optimization for Typst builders.
+
+This requires `Pillow <https://pypi.org/project/pillow/>`_.
+Optimized images are cached by content hash of source and settings,
+so builder processes each image only once.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING
+
+from sphinx.util.logging import getLogger
+
+from . import caching
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from .config import ImageOptimizationSettings
+
+logger = getLogger(__name__)
+
+SUPPORTED_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".pdf"}
+"""Image formats that Typst can embed."""
+
+VECTOR_SUFFIXES = {".svg", ".pdf"}
+"""Image formats that are not processed."""
+
+CONVERTED_SUFFIX = ".png"
+"""Image format to convert from unsupported formats."""
+
+
+def resolve_suffix(suffix: str) -> str:
+    """Retrieve suffix of optimized image."""
+    if suffix.lower() in SUPPORTED_SUFFIXES:
+        return suffix
+    return CONVERTED_SUFFIX
+
+
+def get_cache_name(src: Path, settings: ImageOptimizationSettings) -> str:
+    """Retrieve filename of optimized image in cache directory.
+
+    It is digest of source content and settings,
+    so same image is found from any sources and builds.
+    """
+    suffix = resolve_suffix(src.suffix)
+    return (
+        caching.compute_digest(caching.hash_content(src), dict(settings), suffix)
+        + suffix
+    )
+
+
+def optimize_image(
+    src: Path, settings: ImageOptimizationSettings, cache_dir: Path
+) -> Path:
+    """Downsample, recompress and convert image.
+
+    :param src: Source image.
+    :param settings: Optimization settings.
+    :param cache_dir: Directory to store optimized images.
+    :returns: Path of optimized image.
+              It is source itself when it does not need to process.
+    """
+    if src.suffix.lower() in VECTOR_SUFFIXES:
+        return src
+    suffix = resolve_suffix(src.suffix)
+    cached = cache_dir / get_cache_name(src, settings)
+    if cached.exists():
+        return cached
+
+    from PIL import Image
+
+    try:
+        image = Image.open(src)
+        image.load()
+    except OSError as err:
+        logger.warning("Failed to optimize image '%s': %s", src, err)
+        return src
+    max_width = int(settings["page_width"] * settings["dpi"])
+    if image.width > max_width:
+        height = max(1, round(image.height * max_width / image.width))
+        image = image.resize((max_width, height), Image.Resampling.LANCZOS)
+    save_options: dict = {"optimize": True}
+    if suffix.lower() in (".jpg", ".jpeg"):
+        image = image.convert("RGB")
+        save_options["quality"] = settings["jpeg_quality"]
+    elif suffix.lower() == ".png" and image.mode not in (
+        "1",
+        "L",
+        "LA",
+        "P",
+        "RGB",
+        "RGBA",
+    ):
+        image = image.convert("RGBA")
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Write into temporary file and rename to be safe for concurrent processes.
+    tmp = cached.with_name(f"{cached.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    image.save(
+        tmp, format=Image.registered_extensions()[suffix.lower()], **save_options
+    )
+    os.replace(tmp, cached)
+    return cached
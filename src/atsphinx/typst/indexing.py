@@ -0,0 +1,88 @@
+"""Index generation on Python side.
+
+When :confval:`typst_index_mode` is ``python``,
+translator puts only labels of index targets into body,
+and builder renders sorted and grouped index section from index entries of environment.
+Typst does not need to collect and sort entries while compiling.
+"""
+
+from __future__ import annotations
+
+import re
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+from sphinx.environment.adapters.indexentries import IndexEntries
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from sphinx.environment import BuildEnvironment
+
+_LABEL_INVALID = re.compile(r"[^\w.-]")
+
+
+def make_label(docname: str, target_id: str) -> str:
+    """Create Typst label name of index target.
+
+    Target IDs of Sphinx are unique only in a docname,
+    so label includes docname to be unique in single Typst document.
+    """
+    return "idx-" + _LABEL_INVALID.sub("-", f"{docname}--{target_id}")
+
+
+def _string(text: str) -> str:
+    """Render text as Typst string literal."""
+    escaped = text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+    return f'"{escaped}"'
+
+
+class _UriBuilder:
+    """Builder-like object to keep docname in URI of index entries."""
+
+    def get_relative_uri(self, from_: str, to: str, typ: str | None = None) -> str:
+        return to
+
+
+def create_index(env: BuildEnvironment, docnames: Iterable[str]):
+    """Sort and group index entries of docnames.
+
+    This uses same logic as ``genindex`` of Sphinx,
+    and URIs of entries are ``{docname}#{target_id}``.
+    """
+    domain = env.domains.index_domain
+    entries = {d: domain.entries[d] for d in docnames if d in domain.entries}
+    # Give only entries of docnames in document to adapter.
+    proxy = SimpleNamespace(
+        domains=SimpleNamespace(index_domain=SimpleNamespace(entries=entries))
+    )
+    return IndexEntries(proxy).create_index(_UriBuilder())  # type: ignore[arg-type]
+
+
+def _refs(targets: list[tuple[str | None, str | bool]]) -> str:
+    refs = []
+    for main, uri in targets:
+        if not uri:
+            continue
+        docname, _, target_id = str(uri).partition("#")
+        main_arg = "true" if main else "false"
+        refs.append(f"(<{make_label(docname, target_id)}>, {main_arg})")
+    # Trailing comma to keep array even if it has one item.
+    return f"({', '.join(refs)},)" if refs else "()"
+
+
+def render_index(index) -> str:
+    """Render sorted index as Typst source.
+
+    It uses functions of ``atsphinx-typst`` local package.
+    """
+    lines = []
+    for group_key, terms in index:
+        lines.append(f"#index-group({_string(group_key)})")
+        for term, (targets, sub_items, _key) in terms:
+            lines.append(f"#index-entry({_string(term)}, {_refs(targets)})")
+            for sub_term, sub_targets in sub_items:
+                lines.append(
+                    f"#index-entry({_string(sub_term)}, {_refs(sub_targets)}, level: 1)"
+                )
+    return "\n".join(lines) + "\n"
@@ -16,3 +16,28 @@
     ]
   ]
 }
+
+/*
+* Render heading of group in pre-rendered index.
+*/
+#let index-group(title) = {
+  block(above: 1.2em, below: 0.6em, strong(title))
+}
+
+/*
+* Render entry in pre-rendered index.
+*
+* refs is array of label and flag that it is main entry.
+* Page numbers are resolved from labels.
+*/
+#let index-entry(term, refs, level: 0) = {
+  block(above: 0.4em, below: 0.4em, inset: (left: level * 1em))[
+    #term#for (target, main) in refs {
+      [, ]
+      context {
+        let num = numbering("1", ..counter(page).at(target))
+        link(target, if main { strong(num) } else { num })
+      }
+    }
+  ]
+}
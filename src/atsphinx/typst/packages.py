@@ -0,0 +1,131 @@
+"""Typst package helpers.
+
+* Package registry that renders import statements in stable order.
+* Installation of bundled Typst packages.
+  This is safe version of :func:`rst2typst.package.install_package`.
+  It skips installation when same content is already installed,
+  and it replaces package directory atomically
+  because some builds may run concurrently on same host.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import uuid
+from importlib import metadata
+from typing import TYPE_CHECKING
+
+from rst2typst.package import PackageRegistry as BasePackageRegistry
+from rst2typst.package import build_install_path
+from sphinx.util.logging import getLogger
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+logger = getLogger(__name__)
+
+MARKER_FILENAME = ".atsphinx-typst-install"
+"""Filename to record digest of installed content in package directory."""
+
+_RETRY = 5
+
+
+class PackageRegistry(BasePackageRegistry):
+    """Package registry that renders import statements in stable order.
+
+    Order of packages and entrypoints depends on order of translation
+    (and hash seed for entrypoints) in base class.
+    This sorts them to write same output from same inputs.
+    """
+
+    @property
+    def code(self) -> str:
+        """As Typst code."""
+        lines = []
+        for name in sorted(self):
+            value = ", ".join(sorted(e.code for e in self[name]))
+            lines.append(f'#import "{name}": {value}')
+        return "\n".join(lines)
+
+
+def hash_package(source: Path) -> str:
+    """Calculate digest from relative paths and contents of package files."""
+    digest = hashlib.sha256()
+    for path in sorted(source.rglob("*")):
+        if not path.is_file() or path.name == MARKER_FILENAME:
+            continue
+        digest.update(path.relative_to(source).as_posix().encode("utf8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def resolve_install_path(
+    name: str, version: str | None = None, package_path: Path | None = None
+) -> Path:
+    """Retrieve directory of local package.
+
+    :param name: Name of package.
+    :param version: Version of package. Installed version of Python package by default.
+    :param package_path: Base directory of packages instead of user data directory.
+    """
+    if package_path is None:
+        return build_install_path(name, version)
+    if version is None:
+        version = metadata.version(name)
+    return package_path / "local" / name / version
+
+
+def _read_marker(dest: Path) -> str | None:
+    try:
+        return (dest / MARKER_FILENAME).read_text(encoding="utf8")
+    except OSError:
+        return None
+
+
+def install_package(
+    source: Path,
+    name: str,
+    version: str | None = None,
+    package_path: Path | None = None,
+) -> bool:
+    """Install package directory as Typst local package.
+
+    :param source: Source directory of Typst package.
+    :param name: Name of package.
+    :param version: Version of package.
+    :param package_path: Base directory of packages instead of user data directory.
+    :returns: ``True`` when it installed package,
+              ``False`` when it is already installed.
+    """
+    dest = resolve_install_path(name, version, package_path)
+    digest = hash_package(source)
+    if _read_marker(dest) == digest:
+        logger.debug("Package '%s' is already installed.", name)
+        return False
+
+    logger.debug("Installing '%s' Typst package into %s.", name, dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    token = f"{os.getpid()}-{uuid.uuid4().hex}"
+    tmp = dest.with_name(f".{dest.name}.{token}.tmp")
+    shutil.copytree(source, tmp)
+    (tmp / MARKER_FILENAME).write_text(digest, encoding="utf8")
+    try:
+        for _ in range(_RETRY):
+            try:
+                os.rename(tmp, dest)
+                return True
+            except OSError:
+                # Destination exists (old content or installed by other build).
+                if _read_marker(dest) == digest:
+                    return False
+            old = dest.with_name(f".{dest.name}.{token}.old")
+            try:
+                os.rename(dest, old)
+            except FileNotFoundError:
+                continue
+            shutil.rmtree(old, ignore_errors=True)
+        raise OSError(f"Failed to install package '{name}' into {dest}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
@@ -0,0 +1,158 @@
+"""Measurement helpers for Typst builders.
+
+Builders record elapsed time of each phases (and each documents),
+and write out them as JSON report to track regressions.
+Translator also can measure each node classes when profiling is enabled.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any, Iterator
+
+TIMINGS_FILENAME = "typst-timings.json"
+"""Filename of timing report in output directory."""
+
+
+@dataclass
+class TimingRecord:
+    """Elapsed time of a phase."""
+
+    phase: str
+    """Name of phase."""
+    seconds: float
+    """Elapsed time."""
+    document: str | None = None
+    """Output filename of document when phase works for a document."""
+
+
+class Timings:
+    """Store of elapsed time for each phases."""
+
+    def __init__(self):  # noqa: D107
+        self.records: list[TimingRecord] = []
+        self._document: str | None = None
+
+    @contextmanager
+    def document(self, name: str) -> Iterator[None]:
+        """Set document for phases that are measured in this context."""
+        prev, self._document = self._document, name
+        try:
+            yield
+        finally:
+            self._document = prev
+
+    @contextmanager
+    def measure(self, phase: str) -> Iterator[None]:
+        """Measure elapsed time of phase in this context."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start, self._document)
+
+    def add(self, phase: str, seconds: float, document: str | None = None):
+        """Add record that is measured outside of this object."""
+        self.records.append(TimingRecord(phase, seconds, document))
+
+    def summarize(self) -> dict[str, float]:
+        """Sum elapsed time for each phases (sorted by longest)."""
+        totals: dict[str, float] = {}
+        for record in self.records:
+            totals[record.phase] = totals.get(record.phase, 0.0) + record.seconds
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dict for report."""
+        documents: dict[str, dict[str, float]] = {}
+        for record in self.records:
+            if record.document is None:
+                continue
+            phases = documents.setdefault(record.document, {})
+            phases[record.phase] = phases.get(record.phase, 0.0) + record.seconds
+        return {
+            "phases": self.summarize(),
+            "documents": documents,
+            "records": [asdict(record) for record in self.records],
+        }
+
+    def dump(self, path: Path):
+        """Write report as JSON."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf8")
+
+
+NODE_PROFILE_FILENAME = "typst-node-profile.json"
+"""Filename of translator profile in output directory."""
+
+
+@dataclass
+class NodeStats:
+    """Measured values of a node class."""
+
+    visits: int = 0
+    """Number of visited nodes."""
+    seconds: float = 0.0
+    """Elapsed time in visitor and departure methods (excluding children)."""
+    bytes: int = 0
+    """Size of Typst source that visitor and departure methods emit."""
+
+
+class NodeProfile:
+    """Store of measured values for each node classes in translator."""
+
+    def __init__(self):  # noqa: D107
+        self.stats: dict[str, NodeStats] = {}
+
+    @contextmanager
+    def measure(self, node_class: str, body: list[str], visit: bool) -> Iterator[None]:
+        """Measure dispatching method of a node in this context.
+
+        :param node_class: Class name of node.
+        :param body: Output of translator to count emitted content.
+        :param visit: Whether it is visitor (count visits).
+        """
+        start_length = len(body)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            stats = self.stats.setdefault(node_class, NodeStats())
+            stats.visits += int(visit)
+            stats.seconds += seconds
+            stats.bytes += sum(len(s.encode("utf8")) for s in body[start_length:])
+
+    def merge(self, stats: dict[str, NodeStats]):
+        """Merge values measured in other process."""
+        for name, other in stats.items():
+            current = self.stats.setdefault(name, NodeStats())
+            current.visits += other.visits
+            current.seconds += other.seconds
+            current.bytes += other.bytes
+
+    def ranking(self) -> list[tuple[str, NodeStats]]:
+        """Sort node classes by longest elapsed time."""
+        return sorted(self.stats.items(), key=lambda item: -item[1].seconds)
+
+    def format_table(self, limit: int | None = None) -> str:
+        """Render ranked table as text."""
+        lines = [f"{'node':<32} {'visits':>8} {'seconds':>10} {'bytes':>12}"]
+        for name, stats in self.ranking()[:limit]:
+            lines.append(
+                f"{name:<32} {stats.visits:>8} {stats.seconds:>10.4f} {stats.bytes:>12}"
+            )
+        return "\n".join(lines)
+
+    def dump(self, path: Path):
+        """Write ranked values as JSON."""
+        data = [{"node": name, **asdict(stats)} for name, stats in self.ranking()]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, indent=2), encoding="utf8")
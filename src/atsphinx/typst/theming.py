@@ -5,11 +5,10 @@ This module is inspired :py:mod:`sphinx.theming`, but it is impleemented simplif
 
 from __future__ import annotations
 
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass, fields
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-from rst2typst.package import PackageRegistry
 from sphinx.errors import ThemeError
 from sphinx.jinja2glue import BuiltinTemplateLoader
 
@@ -22,6 +21,7 @@ if TYPE_CHECKING:
     from typing import Any, TypedDict
 
     from .builders import TypstBuilder
+    from .packages import PackageRegistry
 
     class _ThemeToml_Theme(TypedDict, total=False):
         inherit: str
@@ -58,7 +58,8 @@ class Theme:
 
     def get_theme_dirs(self):  # noqa: D102
         # This is to work BuiltinTemplateLoader.init
-        return self._dirs
+        # NOTE: Return copy because loader prepends templates_path into it.
+        return list(self._dirs)
 
     def write_doc(self, out: Path, context: ThemeContext):
         """Write content as document."""
@@ -71,12 +72,15 @@ class Theme:
                     raise ThemeError("Invalid theme package entry: missing 'name'")
                 p_entries = p.get("entrypoints", None)
                 context.packages.add(p_name, p_entries)
-        ctx = asdict(context) | {
+        # NOTE: Pass values directly (not using ``asdict``) to avoid copying body.
+        ctx = {f.name: getattr(context, f.name) for f in fields(context)} | {
             "theme": self._config,
         }
-        content = self._templates.render("document.typ.jinja", ctx)
+        template = self._templates.environment.get_template("document.typ.jinja")
         out.parent.mkdir(parents=True, exist_ok=True)
-        out.write_text(content, encoding="utf8")
+        with out.open("w", encoding="utf8") as fp:
+            for chunk in template.generate(ctx):
+                fp.write(chunk)
 
 
 @dataclass
@@ -107,6 +111,17 @@ class ThemeConfig:
         return obj
 
 
+class Body(list[str]):
+    """Chunks of translated content.
+
+    Templates can write chunks one by one (``{% for chunk in body %}``)
+    to stream rendering, and also can write all as string (``{{ body }}``).
+    """
+
+    def __str__(self) -> str:  # noqa: D105
+        return "".join(self)
+
+
 @dataclass
 class ThemeContext:
     """Context variables for templating.
@@ -133,12 +148,16 @@ class ThemeContext:
     font: str | None
 
     # From translator
-    body: str
+    body: Body
     """Content body from doctree."""
     packages: PackageRegistry
     """Package management object."""
     translated: dict[str, Any]
     """Translated state."""
+    index: str = ""
+    """Pre-rendered index section (only when ``typst_index_mode`` is ``python``)."""
+    draft: bool = False
+    """Build for draft (it does not render front-matter and back-matter)."""
 
 
 def _verify_theme_path(theme_dir: Path) -> bool:
@@ -0,0 +1,202 @@
+"""Vendoring of Typst Universe packages (``@preview`` namespace).
+
+Translator and themes import some packages from Typst Universe,
+and Typst downloads them while compiling.
+This module collects these packages into a local cache directory before building,
+so builder can compile documents without network.
+
+Usage:
+
+.. code-block:: console
+
+   # Write Typst sources at first to find packages that project uses.
+   sphinx-build -b typst . _build/typst
+   # Vendor packages into cache directory.
+   python -m atsphinx.typst.vendoring -o _typst_packages _build/typst
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import re
+import shutil
+import tarfile
+import urllib.request
+import uuid
+from pathlib import Path
+
+from sphinx.util.logging import getLogger
+
+logger = getLogger(__name__)
+
+NAMESPACE = "preview"
+"""Namespace of packages that are vendored."""
+
+REGISTRY_URL = "https://packages.typst.org/preview/{name}-{version}.tar.gz"
+"""URL of package archives in Typst Universe."""
+
+DOWNLOAD_TIMEOUT = 60
+"""Timeout seconds to download package archive."""
+
+PACKAGE_PATTERN = re.compile(
+    r"@preview/(?P<name>[a-zA-Z0-9_-]+):(?P<version>\d+\.\d+\.\d+)"
+)
+"""Pattern to find package specs in Typst sources."""
+
+PackageSpec = tuple[str, str]
+"""Name and version of package."""
+
+
+def find_packages(*paths: Path) -> set[PackageSpec]:
+    """Find specs of ``@preview`` packages that are imported in Typst sources.
+
+    :param paths: Typst sources or directories that have Typst sources.
+    """
+    specs: set[PackageSpec] = set()
+    for base in paths:
+        targets = sorted(base.rglob("*.typ*")) if base.is_dir() else [base]
+        for path in targets:
+            if not path.is_file():
+                continue
+            text = path.read_text(encoding="utf8", errors="ignore")
+            specs |= {(m["name"], m["version"]) for m in PACKAGE_PATTERN.finditer(text)}
+    return specs
+
+
+def resolve_package_dir(cache_dir: Path, spec: PackageSpec) -> Path:
+    """Retrieve directory of package in cache directory.
+
+    This is same layout as ``package_cache_path`` of Typst.
+    """
+    name, version = spec
+    return cache_dir / NAMESPACE / name / version
+
+
+def find_missing(cache_dir: Path, specs: set[PackageSpec]) -> set[PackageSpec]:
+    """Find packages that are not in cache directory including dependencies."""
+    missing: set[PackageSpec] = set()
+    visited: set[PackageSpec] = set()
+    pending = set(specs)
+    while pending:
+        spec = pending.pop()
+        visited.add(spec)
+        package_dir = resolve_package_dir(cache_dir, spec)
+        if not package_dir.is_dir():
+            missing.add(spec)
+            continue
+        pending |= find_packages(package_dir) - visited
+    return missing
+
+
+def _extract(data: bytes, dest: Path):
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as archive:
+        if hasattr(tarfile, "data_filter"):
+            archive.extractall(dest, filter="data")
+            return
+        for member in archive.getmembers():
+            target = (dest / member.name).resolve()
+            if not target.is_relative_to(dest.resolve()) or member.issym():
+                raise ValueError(f"Unsafe member in archive: {member.name}")
+        archive.extractall(dest)
+
+
+def vendor_package(
+    cache_dir: Path, spec: PackageSpec, sources: list[Path] | None = None
+) -> Path:
+    """Put package into cache directory.
+
+    It copies package from other cache directories (e.g. user cache of Typst) at first.
+    When package is not found in them, it downloads archive from Typst Universe.
+
+    :param cache_dir: Cache directory to vendor.
+    :param spec: Name and version of package.
+    :param sources: Other cache directories to find package.
+    :returns: Directory of vendored package.
+    """
+    dest = resolve_package_dir(cache_dir, spec)
+    if dest.is_dir():
+        return dest
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}-{uuid.uuid4().hex}.tmp")
+    try:
+        for source in sources or []:
+            found = resolve_package_dir(source, spec)
+            if found.is_dir():
+                logger.info("Copy package '@preview/%s:%s' from %s", *spec, source)
+                shutil.copytree(found, tmp)
+                break
+        else:
+            url = REGISTRY_URL.format(name=spec[0], version=spec[1])
+            logger.info("Download package '@preview/%s:%s' from %s", *spec, url)
+            with urllib.request.urlopen(url, timeout=DOWNLOAD_TIMEOUT) as resp:
+                _extract(resp.read(), tmp)
+        try:
+            os.rename(tmp, dest)
+        except OSError:
+            # Other process already vendored it.
+            if not dest.is_dir():
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return dest
+
+
+def vendor_packages(
+    cache_dir: Path, specs: set[PackageSpec], sources: list[Path] | None = None
+) -> list[PackageSpec]:
+    """Put packages and their dependencies into cache directory.
+
+    :returns: Specs of packages that are vendored newly.
+    """
+    vendored = []
+    while missing := find_missing(cache_dir, specs):
+        for spec in sorted(missing):
+            vendor_package(cache_dir, spec, sources)
+            vendored.append(spec)
+    return vendored
+
+
+def default_sources() -> list[Path]:
+    """Retrieve cache directories that Typst uses by default.
+
+    It returns nothing when ``platformdirs`` is not installed.
+    """
+    try:
+        import platformdirs
+    except ImportError:
+        return []
+    return [platformdirs.user_cache_path("typst") / "packages"]
+
+
+def main(argv: list[str] | None = None) -> int:  # noqa: D103
+    parser = argparse.ArgumentParser(
+        prog="python -m atsphinx.typst.vendoring",
+        description="Vendor @preview packages that Typst sources import.",
+    )
+    parser.add_argument(
+        "paths", nargs="*", type=Path, help="Typst sources or directories to scan."
+    )
+    parser.add_argument(
+        "-o", "--cache-dir", type=Path, required=True, help="Cache directory."
+    )
+    parser.add_argument(
+        "-p",
+        "--package",
+        action="append",
+        default=[],
+        help="Additional package to vendor (NAME:VERSION).",
+    )
+    args = parser.parse_args(argv)
+    specs = find_packages(*args.paths)
+    for value in args.package:
+        name, _, version = value.removeprefix("@preview/").partition(":")
+        specs.add((name, version))
+    vendored = vendor_packages(args.cache_dir, specs, default_sources())
+    print(f"Vendored {len(vendored)} package(s) into {args.cache_dir}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -24,9 +24,17 @@ from sphinx.util.docutils import SphinxTranslator
 from sphinx.util.index_entries import split_index_msg
 from sphinx.util.logging import getLogger
 
+from .caching import Fragment, compute_digest
+from .indexing import make_label
+from .packages import PackageRegistry
+
 if TYPE_CHECKING:
+    from typing import Any
+
     from sphinx.builders import Builder
 
+    from .profiling import NodeProfile
+
 
 logger = getLogger(__name__)
 
@@ -59,13 +67,43 @@ class TypstTranslator(SphinxTranslator, BaseTypstTranslator):
     def __init__(self, document: nodes.document, builder: Builder) -> None:
         super().__init__(document, builder)
         super(BaseTypstTranslator, self).__init__(document)
+        self.packages = PackageRegistry()
         # Set to avoid rendering root hedering text.
         self._section_level = -1
         self.document.settings.no_import_local_package = False
-        self.context = {
+        self.context = self._init_context()
+        self._fragments: list[tuple[str, str, Any, int, Any, Any, Any]] = []
+        self._node_profile: NodeProfile | None = getattr(builder, "node_profile", None)
+        self._root_docname = builder.env.path2doc(document["source"])
+        self._traversed = {self._root_docname} | builder.excluded_docnames
+        # Fragments of partial build have different links and children.
+        self._excluded_key = (
+            compute_digest(sorted(builder.excluded_docnames))
+            if builder.excluded_docnames
+            else None
+        )
+        self.included_docnames: list[str] = []
+        """Docnames that are translated (or reused from cache) in this document."""
+        self.chapters: dict[str, str] = {}
+        """Content of split files for each paths (only in split output mode)."""
+
+    def _init_context(self) -> dict[str, Any]:
+        return {
             "has_index": False,
         }
 
+    def dispatch_visit(self, node: nodes.Node) -> None:
+        if self._node_profile is None:
+            return super().dispatch_visit(node)
+        with self._node_profile.measure(node.__class__.__name__, self.body, True):
+            super().dispatch_visit(node)
+
+    def dispatch_departure(self, node: nodes.Node) -> None:
+        if self._node_profile is None:
+            return super().dispatch_departure(node)
+        with self._node_profile.measure(node.__class__.__name__, self.body, False):
+            super().dispatch_departure(node)
+
     # ------
     # visit/departuer methods
     # ------
@@ -88,21 +126,47 @@ class TypstTranslator(SphinxTranslator, BaseTypstTranslator):
             self.body.append(f"{self._hi.indent})\n")
 
     def visit_image(self, node: nodes.image):
+        if self.config.typst_draft_mode:
+            self._put_image_placeholder(node)
+            raise nodes.SkipNode
         uri = node["uri"]
         source = Path(self.document["source"])
         uri_path = source.parent / uri
-        uri_dest = self.builder._images_dir / uri_path.relative_to(
-            self.builder.app.srcdir
-        )
+        uri_dest = self.builder.register_image(uri_path)
         uri_map = uri_dest.relative_to(self.builder.outdir)
-        self.builder.images.setdefault(uri_path, uri_dest)
         node["uri"] = uri_map
+        if self.config.typst_split_output:
+            # Split files are in sub directory, so use path from root of project.
+            node["uri"] = f"/{uri_map.as_posix()}"
         super().visit_image(node)
 
+    def _put_image_placeholder(self, node: nodes.image):
+        # Put lightweight box instead of image for draft build.
+        # Prefix and suffix are same as ``visit_image`` of rst2typst.
+        prefix = self._hi.indent
+        suffix = "\n\n"
+        if isinstance(node.parent, nodes.figure):
+            suffix = "]"
+        elif isinstance(node.parent, nodes.reference):
+            prefix = f"\n{prefix}"
+            suffix = "]"
+        label = node.get("alt") or Path(node["uri"]).name
+        label = label.replace("\\", "\\\\").replace('"', '\\"')
+        width = node.get("width", "100%")
+        self.body.append(
+            f"{prefix}#rect(width: {width}, height: 3em, stroke: 0.5pt + gray)"
+            f'[#text(size: 8pt, fill: gray, "{label}")]{suffix}'
+        )
+        if isinstance(node.parent, nodes.reference):
+            self._hi.pop()
+
     def visit_reference(self, node):
         # NOTE: It may be should implement in rst2typst.
         if not node.get("internal", False):
             return super().visit_reference(node)
+        if "refuri" in node and not node["refuri"].startswith("#"):
+            # Target is not in document (excluded by partial build).
+            return self.body.append("#[")
         if "refuri" in node:
             uri = node["refuri"][1:]
         elif "refid" in node:
@@ -154,8 +218,15 @@ class TypstTranslator(SphinxTranslator, BaseTypstTranslator):
         def _escape(txt: str) -> str:
             return txt.replace("\\", "\\\\").replace('"', '\\"')
 
-        self.packages.add("@preview/in-dexter:0.7.2")
+        if self.config.typst_draft_mode:
+            # Draft build does not render index.
+            raise nodes.SkipNode
         self.context["has_index"] = True
+        if self.config.typst_index_mode == "python":
+            self._put_index_labels(node)
+            raise nodes.SkipNode
+
+        self.packages.add("@preview/in-dexter:0.7.2")
         for entry in node.get("entries", []):
             entrytype, entryname, _target, _ignored, _key = entry
             if entrytype != "pair":
@@ -170,9 +241,95 @@ class TypstTranslator(SphinxTranslator, BaseTypstTranslator):
     def depart_index(self, node: addnodes.index):
         pass
 
+    def _put_index_labels(self, node: addnodes.index):
+        # Put only labels. Builder renders index section from entries of environment.
+        docname = self._fragments[-1][0] if self._fragments else self._root_docname
+        target_ids = dict.fromkeys(entry[2] for entry in node.get("entries", []))
+        for target_id in target_ids:
+            label = make_label(docname, target_id)
+            self.body.append(f"#metadata(none) <{label}>")
+        if not isinstance(node.parent, nodes.TextElement):
+            self.body.append("\n")
+
+    def visit_toctree(self, node: addnodes.toctree):
+        # Toctree remains only when builder assembles doctree by streaming.
+        # Translate included docnames one by one instead of inlined doctree.
+        for docname in map(str, node["includefiles"]):
+            if docname in self._traversed:
+                continue
+            self._traversed.add(docname)
+            sof = addnodes.start_of_file(docname=docname, stream=True)
+            sof.parent = node.parent
+            sof.document = self.document
+            sof.walkabout(self)
+        raise nodes.SkipNode
+
     def visit_start_of_file(self, node: addnodes.start_of_file):
         # NOTE: Implement this when rendering anything as the "start of file."
-        pass
+        # Reuse translated fragment of docname when it is cached.
+        docname = node["docname"]
+        source_key = self.builder.get_fragment_source_key(node)
+        state_key = (self._section_level, tuple(self._hi), self._excluded_key)
+        fragment = self.builder.fragments.get(docname, source_key, state_key)
+        # Translate all nodes when profiling to measure them.
+        if fragment is not None and self._node_profile is None:
+            self.body.append(fragment.body)
+            self._merge_fragment(fragment)
+            self.included_docnames += self.builder.get_included_docnames(node)
+            raise nodes.SkipNode
+        self.included_docnames.append(docname)
+        if node.get("stream"):
+            self.builder.load_stream_doctree(node)
+        # Collect packages and images used in this docname separately.
+        self._fragments.append(
+            (
+                docname,
+                source_key,
+                state_key,
+                len(self.body),
+                self.packages,
+                self.builder.images,
+                self.context,
+                self.chapters,
+            )
+        )
+        self.packages = PackageRegistry()
+        self.builder.images = {}
+        self.context = self._init_context()
+        self.chapters = {}
 
     def depart_start_of_file(self, node: addnodes.start_of_file):
-        pass
+        if node.get("stream"):
+            # Release translated doctree of docname.
+            node.children = []
+        docname, source_key, state_key, start, packages, images, context, chapters = (
+            self._fragments.pop()
+        )
+        body = "".join(self.body[start:])
+        if self.config.typst_split_output:
+            # Move content into own file and include it.
+            path = self.builder.get_chapter_path(docname, state_key)
+            self.chapters = {path: f"{self.packages.code}\n\n{body}"} | self.chapters
+            del self.body[start:]
+            body = f'#include "/{path}"\n\n'
+            self.body.append(body)
+        fragment = Fragment(
+            body=body,
+            packages=self.packages,
+            images=self.builder.images,
+            context={k: v for k, v in self.context.items() if v},
+            chapters=self.chapters,
+        )
+        self.builder.fragments.set(docname, source_key, state_key, fragment)
+        self.packages = packages
+        self.builder.images = images
+        self.context = context
+        self.chapters = chapters
+        self._merge_fragment(fragment)
+
+    def _merge_fragment(self, fragment: Fragment):
+        for name, entrypoints in fragment.packages.items():
+            self.packages.setdefault(name, set()).update(entrypoints)
+        self.builder.images.update(fragment.images)
+        self.context.update(fragment.context)
+        self.chapters.update(fragment.chapters or {})
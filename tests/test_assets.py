@@ -0,0 +1,49 @@
+"""Test for asset helpers."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from atsphinx.typst import assets as t
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test__copy_files(tmp_path: Path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.png").write_bytes(b"image-a")
+    files = {src / "a.png": tmp_path / "out" / "a.png"}
+    assert t.copy_files(files) == [tmp_path / "out" / "a.png"]
+    assert (tmp_path / "out" / "a.png").read_bytes() == b"image-a"
+    assert t.copy_files(files) == []
+
+
+def test__skip_missing(tmp_path: Path):
+    (tmp_path / "a.png").write_bytes(b"image-a")
+    files = {
+        tmp_path / "a.png": tmp_path / "out" / "a.png",
+        tmp_path / "missing.png": tmp_path / "out" / "missing.png",
+    }
+    assert t.copy_files(files) == [tmp_path / "out" / "a.png"]
+    assert not (tmp_path / "out" / "missing.png").exists()
+
+
+def test__deduplicate(tmp_path: Path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.png").write_bytes(b"same")
+    (src / "b.png").write_bytes(b"same")
+    out = tmp_path / "out"
+    t.copy_files({src / "a.png": out / "a.png", src / "b.png": out / "b.png"})
+    assert (out / "a.png").stat().st_ino == (out / "b.png").stat().st_ino
+
+
+def test__hardlink(tmp_path: Path):
+    (tmp_path / "a.png").write_bytes(b"image-a")
+    dest = tmp_path / "out" / "a.png"
+    t.copy_files({tmp_path / "a.png": dest}, mode="hardlink")
+    assert dest.stat().st_ino == (tmp_path / "a.png").stat().st_ino
+    t.copy_files({tmp_path / "a.png": dest}, mode="copy")
+    assert dest.stat().st_ino == (tmp_path / "a.png").stat().st_ino
@@ -2,10 +2,14 @@
 # ruff: noqa: D101, D102, D106, D107
 from __future__ import annotations
 
+import importlib.util
+import json
+import shutil
 from typing import TYPE_CHECKING
 
 import pytest
 from docutils import nodes
+from sphinx.errors import SphinxError
 
 from atsphinx.typst import builders as t
 
@@ -54,6 +58,381 @@ class Test_TypstBuilder:
             out = app.outdir / "index.typ"
             assert '#set text(font: "Noto Serif CJK JP")' in out.read_text()
 
+    class Test_incremental:
+        @pytest.mark.sphinx("typst", testroot="toctree", srcdir="incremental-skip")
+        def test__skip_up_to_date(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            out = app.outdir / "index.typ"
+            mtime = out.stat().st_mtime_ns
+            app.build()
+            assert out.stat().st_mtime_ns == mtime
+
+        @pytest.mark.sphinx("typst", testroot="toctree", srcdir="incremental-update")
+        def test__rebuild_changed(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            src = app.srcdir / "section-1-1.rst"
+            src.write_text(src.read_text() + "\nUpdated content\n")
+            app.build()
+            assert "Updated content" in (app.outdir / "index.typ").read_text()
+
+        @pytest.mark.sphinx("typst", testroot="toctree", srcdir="incremental-force")
+        def test__force_all(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            out = app.outdir / "index.typ"
+            mtime = out.stat().st_mtime_ns
+            app.build(force_all=True)
+            assert out.stat().st_mtime_ns != mtime
+
+        @pytest.mark.sphinx("typst", testroot="toctree", srcdir="incremental-config")
+        def test__fingerprint_unstable_repr(self, app: SphinxTestApp):
+            """Test to pass."""
+
+            class Option:
+                pass
+
+            app.build()
+            builder: t.TypstBuilder = app.builder
+            settings = app.config.typst_documents[0]
+            app.config.html_context = {"option": Option()}
+            fingerprint = builder.compute_fingerprint(settings)
+            app.config.html_context = {"option": Option()}
+            assert builder.compute_fingerprint(settings) == fingerprint
+
+    class Test_stream_assembly:
+        @pytest.mark.sphinx("typst", testroot="toctree", srcdir="stream-inline")
+        def test__same_output(self, app: SphinxTestApp, make_app):
+            """Test to pass."""
+            app.build()
+            stream_app = make_app(
+                "typst",
+                srcdir=app.srcdir,
+                builddir=app.srcdir / "_build-stream",
+                confoverrides={"typst_stream_assembly": True},
+            )
+            stream_app.build()
+            expected = (app.outdir / "index.typ").read_text()
+            assert (stream_app.outdir / "index.typ").read_text() == expected
+            builder: t.TypstBuilder = stream_app.builder
+            record = builder._build_info.documents["index"]
+            assert record.docnames == ["index", "section-1", "section-1-1"]
+
+        @pytest.mark.sphinx(
+            "typst",
+            testroot="toctree",
+            srcdir="stream-update",
+            confoverrides={"typst_stream_assembly": True},
+        )
+        def test__rebuild_changed(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            src = app.srcdir / "section-1-1.rst"
+            src.write_text(src.read_text() + "\nUpdated content\n")
+            app.build()
+            assert "Updated content" in (app.outdir / "index.typ").read_text()
+
+    class Test_split_output:
+        @pytest.mark.sphinx(
+            "typst",
+            testroot="toctree",
+            srcdir="split-output",
+            confoverrides={"typst_split_output": True},
+        )
+        def test__keep_unchanged(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            files = {
+                p.name.rsplit("-", 1)[0]: p
+                for p in (app.outdir / "_chapters").glob("*.typ")
+            }
+            assert set(files) == {"section-1", "section-1-1"}
+            index = (app.outdir / "index.typ").read_text()
+            assert f'#include "/_chapters/{files["section-1"].name}"' in index
+            mtime = files["section-1"].stat().st_mtime_ns
+            src = app.srcdir / "section-1-1.rst"
+            src.write_text(src.read_text() + "\nUpdated content\n")
+            app.build()
+            assert "Updated content" in files["section-1-1"].read_text()
+            assert files["section-1"].stat().st_mtime_ns == mtime
+
+        @pytest.mark.sphinx(
+            "typst",
+            testroot="toctree",
+            srcdir="split-output-stale",
+            confoverrides={"typst_split_output": True},
+        )
+        def test__remove_stale(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            stale = app.outdir / "_chapters/removed-00000000.typ"
+            stale.write_text("")
+            app.build(force_all=True)
+            assert not stale.exists()
+            assert len(list((app.outdir / "_chapters").glob("*.typ"))) == 2
+
+    class Test_fragments:
+        @pytest.mark.sphinx("typst", testroot="toctree", srcdir="fragments-reuse")
+        def test__reuse_cached(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            builder: t.TypstBuilder = app.builder
+            _, fragments = builder.fragments._entries["section-1"]
+            for fragment in fragments.values():
+                fragment.body = "CACHED FRAGMENT"
+            app.build(force_all=True)
+            out = (app.outdir / "index.typ").read_text()
+            assert "CACHED FRAGMENT" in out
+            assert "Section title 1" not in out
+
+        @pytest.mark.sphinx("typst", testroot="toctree", srcdir="fragments-update")
+        def test__invalidate_parent(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            builder: t.TypstBuilder = app.builder
+            key, _ = builder.fragments._entries["section-1"]
+            src = app.srcdir / "section-1-1.rst"
+            src.write_text(src.read_text() + "\nUpdated content\n")
+            app.build()
+            assert builder.fragments._entries["section-1"][0] != key
+
+    class Test_shared_cache:
+        @pytest.mark.sphinx(
+            "typst",
+            testroot="toctree",
+            srcdir="shared-cache-fragments",
+            confoverrides={"typst_cache_dir": "_cache"},
+        )
+        def test__reuse_fragments(self, app: SphinxTestApp, make_app):
+            """Test to pass."""
+            app.build()
+            entries = [
+                p for p in (app.srcdir / "_cache/fragments").rglob("*") if p.is_file()
+            ]
+            assert entries
+            for path in entries:
+                data = json.loads(path.read_text())
+                data["body"] = "SHARED FRAGMENT"
+                path.write_text(json.dumps(data))
+            # Start from cold state like other build host.
+            shutil.rmtree(app.outdir)
+            shutil.rmtree(app.doctreedir)
+            other = make_app(
+                "typst", srcdir=app.srcdir, confoverrides={"typst_cache_dir": "_cache"}
+            )
+            other.build()
+            out = (other.outdir / "index.typ").read_text()
+            assert "SHARED FRAGMENT" in out
+            assert "Section title 1" not in out
+            assert "typst_cache_dir" not in other.warning.getvalue()
+
+    class Test_draft_mode:
+        @pytest.mark.sphinx(
+            "typst",
+            testroot="with-images",
+            srcdir="draft-images",
+            confoverrides={"typst_draft_mode": True},
+        )
+        def test__placeholder(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            out = (app.outdir / "index.typ").read_text()
+            assert '"example.png"' in out
+            assert "#image(" not in out
+            assert "#outline()" not in out
+            assert not (app.outdir / "_images").exists()
+
+        @pytest.mark.sphinx(
+            "typst",
+            testroot="with-index",
+            srcdir="draft-index",
+            confoverrides={"typst_draft_mode": True},
+        )
+        def test__skip_index(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            out = (app.outdir / "index.typ").read_text()
+            assert "in-dexter" not in out
+            assert "= Index" not in out
+
+        @pytest.mark.sphinx("typst", testroot="with-images", srcdir="draft-switch")
+        def test__switch(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            assert "#image(" in (app.outdir / "index.typ").read_text()
+            app.config.typst_draft_mode = True
+            app.build()
+            assert "#image(" not in (app.outdir / "index.typ").read_text()
+
+    class Test_include_docnames:
+        @pytest.mark.sphinx(
+            "typst",
+            testroot="partial",
+            srcdir="partial-config",
+            confoverrides={"typst_include_docnames": ["chapter-1"]},
+        )
+        def test__subtree(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            out = (app.outdir / "index.typ").read_text()
+            assert "Content of chapter 1." in out
+            assert "Content of section 1-1." in out
+            assert "Content of chapter 2." not in out
+
+        @pytest.mark.sphinx("typst", testroot="partial", srcdir="partial-shared")
+        def test__with_full_document(self, app: SphinxTestApp):
+            """Test to pass."""
+            base = app.config.typst_documents[0]
+            app.config.typst_documents = [
+                base | {"filename": "part", "include_docnames": ["chapter-2"]},
+                base | {"filename": "full"},
+                base | {"filename": "part-2", "include_docnames": ["chapter-2"]},
+            ]
+            app.build()
+            full = (app.outdir / "full.typ").read_text()
+            assert "#link(<chapter-1>)" in full
+            assert "#[Chapter 1]" not in full
+            for filename in ("part", "part-2"):
+                part = (app.outdir / f"{filename}.typ").read_text()
+                assert "#[Chapter 1]" in part
+                assert "#link(<chapter-1>)" not in part
+
+        @pytest.mark.sphinx("typst", testroot="partial", srcdir="partial-settings")
+        def test__document_settings(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.config.typst_documents[0]["include_docnames"] = ["chapter-2"]
+            app.build()
+            out = (app.outdir / "index.typ").read_text()
+            assert "Content of chapter 2." in out
+            assert "Content of chapter 1." not in out
+            # References to excluded docnames are written as text.
+            assert "#link(<chapter-1>)" not in out
+            assert "Chapter 1" in out
+            builder: t.TypstBuilder = app.builder
+            assert builder._build_info.documents["index"].docnames == [
+                "index",
+                "chapter-2",
+            ]
+
+    class Test_copy_assets:
+        @pytest.mark.sphinx(
+            "typst",
+            testroot="root",
+            srcdir="sync-static",
+            confoverrides={"typst_static_path": ["_static"]},
+        )
+        def test__sync_static(self, app: SphinxTestApp):
+            """Test to pass."""
+            static_dir = app.srcdir / "_static"
+            static_dir.mkdir(exist_ok=True)
+            (static_dir / "keep.txt").write_text("keep")
+            (static_dir / "stale.txt").write_text("stale")
+            app.build()
+            kept = app.outdir / "_static/keep.txt"
+            mtime = kept.stat().st_mtime_ns
+            assert (app.outdir / "_static/stale.txt").exists()
+            (static_dir / "stale.txt").unlink()
+            app.build(force_all=True)
+            assert kept.stat().st_mtime_ns == mtime
+            assert not (app.outdir / "_static/stale.txt").exists()
+
+    class Test_copy_images:
+        @pytest.mark.sphinx("typst", testroot="missing-image")
+        def test__skip_missing(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            assert (app.outdir / "index.typ").exists()
+            assert "missing.png" in app.warning.getvalue()
+            assert not (app.outdir / "_images/missing.png").exists()
+
+    class Test_optimize_images:
+        # Skip before creating app because builder requires pillow.
+        @pytest.mark.skipif(
+            importlib.util.find_spec("PIL") is None, reason="Require 'pillow'."
+        )
+        @pytest.mark.sphinx(
+            "typst",
+            testroot="with-images",
+            confoverrides={"typst_image_optimization": {"dpi": 10, "page_width": 1}},
+        )
+        def test__downsample(self, app: SphinxTestApp):
+            """Test to pass."""
+            from PIL import Image
+
+            app.build()
+            assert '"_images/example.png"' in (app.outdir / "index.typ").read_text()
+            with Image.open(app.outdir / "_images/example.png") as image:
+                assert image.width <= 10
+
+    class Test_write_documents:
+        @pytest.mark.sphinx(
+            "typst",
+            testroot="with-images",
+            parallel=2,
+            confoverrides={
+                "typst_documents": [
+                    {"entrypoint": "index", "filename": "document-1", "title": "1"},
+                    {"entrypoint": "index", "filename": "document-2", "title": "2"},
+                ]
+            },
+        )
+        def test__parallel(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            builder: t.TypstBuilder = app.builder
+            assert builder.parallel_ok
+            assert (app.outdir / "document-1.typ").exists()
+            assert (app.outdir / "document-2.typ").exists()
+            assert (app.outdir / "_images/example.png").exists()
+
+        @pytest.mark.sphinx(
+            "typst",
+            testroot="root",
+            srcdir="shared-entrypoint",
+            confoverrides={
+                "typst_documents": [
+                    {"entrypoint": "index", "filename": "document-1", "title": "1"},
+                    {
+                        "entrypoint": "index",
+                        "filename": "document-2",
+                        "title": "2",
+                        "theme": "basic",
+                    },
+                ]
+            },
+        )
+        def test__translate_once(self, app: SphinxTestApp, mocker: MockFixture):
+            """Test to pass."""
+            builder: t.TypstBuilder = app.builder
+            spy = mocker.spy(builder, "assemble_doctree")
+            app.build()
+            assert spy.call_count == 1
+            assert "title: [1]," in (app.outdir / "document-1.typ").read_text()
+            assert "title: [2]," in (app.outdir / "document-2.typ").read_text()
+            assert set(builder._build_info.documents) == {"document-1", "document-2"}
+
+    class Test_profile_translator:
+        @pytest.mark.sphinx(
+            "typst",
+            testroot="with-images",
+            confoverrides={"typst_profile_translator": True},
+        )
+        def test__write_profile(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            profile = json.loads((app.outdir / "typst-node-profile.json").read_text())
+            stats = {item["node"]: item for item in profile}
+            assert stats["document"]["visits"] == 1
+            assert stats["image"]["visits"] == 1
+            assert stats["image"]["bytes"] > 0
+
+        @pytest.mark.sphinx("typst", testroot="root", srcdir="no-profile")
+        def test__disabled(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            assert not (app.outdir / "typst-node-profile.json").exists()
+
 
 class Test_TypstPDFBuilder:
     class Test_assemble_doctree:
@@ -68,10 +447,276 @@ class Test_TypstPDFBuilder:
             """Test to pass."""
             import typst
 
-            mocker.patch("typst.compile", return_value=None)
-            spy = mocker.spy(typst, "compile")
+            spy = mocker.spy(typst, "Fonts")
+            app.build()
+            assert spy.call_args.kwargs["font_paths"] == ["/tmp"]
+
+    class Test_compile_cache:
+        @pytest.mark.sphinx("typstpdf", testroot="root", srcdir="compile-cache")
+        def test__skip_unchanged(self, app: SphinxTestApp, mocker: MockFixture):
+            """Test to pass."""
+            app.build()
+            spy = mocker.spy(t, "_compile_document")
+            app.build(force_all=True)
+            assert spy.call_count == 0
+
+        @pytest.mark.sphinx("typstpdf", testroot="root", srcdir="compile-missing")
+        def test__recompile_missing(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            out = app.outdir / "index.pdf"
+            out.unlink()
+            app.build()
+            assert out.exists()
+
+    class Test_compile_documents:
+        @pytest.mark.sphinx(
+            "typstpdf",
+            testroot="root",
+            srcdir="compiler-reuse",
+            confoverrides={
+                "typst_documents": [
+                    {"entrypoint": "index", "filename": "document-1", "title": "1"},
+                    {"entrypoint": "index", "filename": "document-2", "title": "2"},
+                ]
+            },
+        )
+        def test__reuse_compiler(self, app: SphinxTestApp, mocker: MockFixture):
+            """Test to pass."""
+            import typst
+
+            spy = mocker.spy(typst, "Compiler")
+            app.build()
+            assert spy.call_count == 1
+            assert (app.outdir / "document-1.pdf").exists()
+            assert (app.outdir / "document-2.pdf").exists()
+
+        @pytest.mark.sphinx(
+            "typstpdf",
+            testroot="root",
+            confoverrides={"typst_compile_workers": 2},
+        )
+        def test__report_failures(self, app: SphinxTestApp):
+            """Test to pass."""
+            builder: t.TypstPDFBuilder = app.builder
+            app.outdir.mkdir(parents=True, exist_ok=True)
+            (app.outdir / "good.typ").write_text("Hello")
+            (app.outdir / "bad.typ").write_text("#unknown-function()")
+            targets = [
+                (name, app.outdir / f"{name}.typ", app.outdir / f"{name}.pdf")
+                for name in ("good", "bad")
+            ]
+            errors = builder.compile_documents(targets, {})
+            assert list(errors) == ["bad"]
+            assert (app.outdir / "good.pdf").exists()
+
+    class Test_isolate_packages:
+        @pytest.mark.sphinx(
+            "typstpdf",
+            testroot="root",
+            srcdir="isolate-packages",
+            confoverrides={"typst_isolate_packages": True},
+        )
+        def test__install_into_outdir(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            assert (app.outdir / "_packages/local/atsphinx-typst").is_dir()
+            assert (app.outdir / "_packages/local/rst2typst").is_dir()
+            assert (app.outdir / "index.pdf").exists()
+
+    class Test_package_cache_dir:
+        @pytest.mark.sphinx(
+            "typstpdf",
+            testroot="root",
+            srcdir="package-cache-dir",
+            confoverrides={"typst_package_cache_dir": "_packages"},
+        )
+        def test__compile_with_vendored(self, app: SphinxTestApp):
+            """Test to pass."""
+            package_dir = app.srcdir / "_packages/preview/example/0.1.0"
+            package_dir.mkdir(parents=True)
+            (package_dir / "typst.toml").write_text(
+                '[package]\nname = "example"\nversion = "0.1.0"\n'
+                'entrypoint = "lib.typ"\n'
+            )
+            (package_dir / "lib.typ").write_text("#let hello = [Hello]")
+            app.build()
+            src = app.outdir / "index.typ"
+            src.write_text('#import "@preview/example:0.1.0": hello\n#hello')
+            builder: t.TypstPDFBuilder = app.builder
+            builder.verify_vendored_packages([src])
+            kwargs = {"package_cache_path": app.srcdir / "_packages"}
+            errors = builder.compile_documents(
+                [("index", src, app.outdir / "index.pdf")], kwargs
+            )
+            assert errors == {}
+            assert "typst_package_cache_dir" not in app.warning.getvalue()
+
+        @pytest.mark.sphinx(
+            "typstpdf",
+            testroot="root",
+            confoverrides={"typst_package_cache_dir": "_packages"},
+        )
+        def test__missing(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.outdir.mkdir(parents=True, exist_ok=True)
+            src = app.outdir / "index.typ"
+            src.write_text('#import "@preview/in-dexter:0.7.2": *')
+            builder: t.TypstPDFBuilder = app.builder
+            with pytest.raises(SphinxError, match="in-dexter:0.7.2"):
+                builder.verify_vendored_packages([src])
+
+    class Test_shared_cache:
+        @pytest.mark.sphinx(
+            "typstpdf",
+            testroot="root",
+            srcdir="shared-cache-pdf",
+            confoverrides={"typst_cache_dir": "_cache"},
+        )
+        def test__reuse_pdf(self, app: SphinxTestApp, make_app, mocker: MockFixture):
+            """Test to pass."""
+            app.build()
+            assert list((app.srcdir / "_cache/pdf").rglob("*"))
+            shutil.rmtree(app.outdir)
+            shutil.rmtree(app.doctreedir)
+            spy = mocker.spy(t, "_compile_document")
+            other = make_app(
+                "typstpdf",
+                srcdir=app.srcdir,
+                confoverrides={"typst_cache_dir": "_cache"},
+            )
+            other.build()
+            assert spy.call_count == 0
+            assert (other.outdir / "index.pdf").exists()
+
+    class Test_pipeline_compile:
+        @pytest.mark.sphinx(
+            "typstpdf",
+            testroot="with-images",
+            srcdir="pipeline-compile",
+            confoverrides={"typst_pipeline_compile": True},
+        )
+        def test__compile_on_background(self, app: SphinxTestApp, mocker: MockFixture):
+            """Test to pass."""
+            spy = mocker.spy(t, "_compile_document")
             app.build()
-            assert "font_paths" in spy.call_args.kwargs
+            assert spy.call_count == 0
+            assert (app.outdir / "index.pdf").exists()
+            timings = json.loads((app.outdir / "typst-timings.json").read_text())
+            assert "compile_wait" in json.dumps(timings)
+            builder: t.TypstPDFBuilder = app.builder
+            assert "index" in builder._build_info.compiled
+
+    class Test_draft_mode:
+        @pytest.mark.sphinx(
+            "typstpdf",
+            testroot="with-images",
+            srcdir="draft-pdf",
+            confoverrides={"typst_draft_mode": True},
+        )
+        def test__compile(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            assert (app.outdir / "index.pdf").exists()
+
+    class Test_include_docnames:
+        @pytest.mark.sphinx(
+            "typstpdf",
+            testroot="partial",
+            srcdir="partial-pdf",
+            confoverrides={"typst_include_docnames": ["chapter-2"]},
+        )
+        def test__compile(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            assert (app.outdir / "index.pdf").exists()
+
+    class Test_output_formats:
+        @pytest.mark.sphinx("typstpdf", testroot="root", srcdir="output-formats")
+        def test__pages(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.config.typst_documents[0]["formats"] = [
+                {"format": "png", "pages": "1", "ppi": 10},
+                {"format": "svg", "pages": "2-", "ppi": None},
+            ]
+            app.build()
+            assert (app.outdir / "index.pdf").exists()
+            assert [p.name for p in app.outdir.glob("index-*.png")] == ["index-1.png"]
+            svgs = sorted(p.name for p in app.outdir.glob("index-*.svg"))
+            assert svgs and "index-1.svg" not in svgs
+
+        @pytest.mark.sphinx(
+            "typstpdf", testroot="root", srcdir="output-formats-missing"
+        )
+        def test__regenerate_missing(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.config.typst_documents[0]["formats"] = [
+                {"format": "png", "pages": "1", "ppi": 10},
+            ]
+            app.build()
+            page = app.outdir / "index-1.png"
+            page.unlink()
+            app.build()
+            assert page.exists()
+
+        @pytest.mark.sphinx(
+            "typstpdf",
+            testroot="root",
+            srcdir="output-formats-shared",
+            confoverrides={"typst_cache_dir": "_cache"},
+        )
+        def test__with_shared_cache(self, app: SphinxTestApp, make_app):
+            """Test to pass."""
+            formats = [{"format": "png", "pages": "1", "ppi": 10}]
+            app.config.typst_documents[0]["formats"] = formats
+            app.build()
+            shutil.rmtree(app.outdir)
+            shutil.rmtree(app.doctreedir)
+            other = make_app(
+                "typstpdf",
+                srcdir=app.srcdir,
+                confoverrides={"typst_cache_dir": "_cache"},
+            )
+            other.config.typst_documents[0]["formats"] = formats
+            other.build()
+            assert (other.outdir / "index-1.png").exists()
+
+    class Test_reproducible:
+        @pytest.mark.sphinx(
+            "typstpdf",
+            testroot="root",
+            srcdir="reproducible-1",
+            confoverrides={"typst_build_date": "2024-01-02"},
+        )
+        def test__same_pdf(self, app: SphinxTestApp, make_app):
+            """Test to pass."""
+            app.build()
+            other = make_app(
+                "typstpdf",
+                srcdir=app.srcdir,
+                builddir=app.srcdir / "_build-other",
+                confoverrides={"typst_build_date": "2024-01-02"},
+            )
+            other.build()
+            assert "2024-01-02" in (app.outdir / "index.typ").read_text()
+            pdf = (app.outdir / "index.pdf").read_bytes()
+            assert (other.outdir / "index.pdf").read_bytes() == pdf
+
+        def test__source_date_epoch(self, monkeypatch: pytest.MonkeyPatch):
+            """Test to pass."""
+            monkeypatch.setenv("SOURCE_DATE_EPOCH", "1704153600")
+            assert t.resolve_build_timestamp(None) == 1704153600
+            assert t.resolve_build_timestamp("2024-01-03") == 1704240000
+
+    class Test_report_timings:
+        @pytest.mark.sphinx("typstpdf", testroot="root", srcdir="timings")
+        def test__write_report(self, app: SphinxTestApp):
+            """Test to pass."""
+            app.build()
+            report = json.loads((app.outdir / "typst-timings.json").read_text())
+            for phase in ("translate", "render", "install_package", "compile"):
+                assert phase in report["phases"]
+            assert "compile" in report["documents"]["index"]
 
     class Test_override_module:
         @pytest.mark.sphinx("typstpdf", testroot="override-typst-module")
@@ -80,3 +725,18 @@ class Test_TypstPDFBuilder:
             app.build()
             assert (app.outdir / "index.typ").exists()
             assert (app.outdir / "index.pdf").exists()
+
+
+@pytest.mark.parametrize(
+    "spec,expected",
+    [
+        (None, [1, 2, 3, 4, 5]),
+        ("1", [1]),
+        ("2-3,5", [2, 3, 5]),
+        ("4-", [4, 5]),
+        ("-2", [1, 2]),
+        ("3-9", [3, 4, 5]),
+    ],
+)
+def test__parse_page_ranges(spec, expected):
+    assert t.parse_page_ranges(spec, 5) == expected
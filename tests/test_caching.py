@@ -0,0 +1,68 @@
+"""Test for caching helpers."""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+from atsphinx.typst import caching as t
+from atsphinx.typst.packages import PackageRegistry
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test__shared_cache(tmp_path: Path):
+    cache = t.SharedCache(tmp_path, 100)
+    assert cache.read("pdf", "abcd") is None
+    cache.write("pdf", "abcd", b"content")
+    assert cache.read("pdf", "abcd") == b"content"
+    assert cache.fetch("pdf", "abcd", tmp_path / "out/document.pdf")
+    assert (tmp_path / "out/document.pdf").read_bytes() == b"content"
+
+
+def test__shared_cache_evict(tmp_path: Path):
+    cache = t.SharedCache(tmp_path / "cache", 20)
+    for n, key in enumerate(["aa01", "aa02", "aa03"]):
+        cache.write("images", key, b"x" * 10)
+        path = cache.get_path("images", key)
+        os.utime(path, (n, n))
+    # Reading entry marks it as recently used.
+    cache.read("images", "aa01")
+    assert cache.evict() == 1
+    assert cache.read("images", "aa01") is not None
+    assert cache.read("images", "aa02") is None
+    assert cache.read("images", "aa03") is not None
+
+
+def test__fragments_from_shared_cache(tmp_path: Path):
+    shared = t.SharedCache(tmp_path / "shared", 1024**2)
+    fragment = t.Fragment(body="body", packages={}, images={}, context={})
+    first = t.FragmentCache(tmp_path / "first.pickle", shared)
+    first.set("index", "key", (0, ()), fragment)
+    second = t.FragmentCache(tmp_path / "second.pickle", shared)
+    assert second.get("index", "key", (0, ())) == fragment
+    assert second.get("index", "other", (0, ())) is None
+    assert "index" in second.updated
+
+
+def test__fragment_json(tmp_path: Path):
+    packages = PackageRegistry()
+    packages.add("@local/atsphinx-typst:0.1.0", "desc")
+    packages.add("@preview/example:0.1.0", ("item", "example-item"))
+    fragment = t.Fragment(
+        body="body",
+        packages=packages,
+        images={tmp_path / "a.png": tmp_path / "out/a.png"},
+        context={"has_index": True},
+        chapters={"_chapters/a.typ": "content"},
+    )
+    assert t.Fragment.loads(fragment.dumps()) == fragment
+
+
+def test__ignore_broken_shared_fragment(tmp_path: Path):
+    shared = t.SharedCache(tmp_path / "shared", 1024**2)
+    cache = t.FragmentCache(tmp_path / "fragments.pickle", shared)
+    key = t.compute_digest("index", "key", (0, ()))
+    shared.write("fragments", key, b"\x80\x04not json")
+    assert cache.get("index", "key", (0, ())) is None
@@ -0,0 +1,40 @@
+"""Test for image optimization."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from atsphinx.typst import config
+from atsphinx.typst import imaging as t
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+Image = pytest.importorskip("PIL.Image")
+
+SETTINGS = config.DEFAULT_IMAGE_OPTIMIZATION_SETTINGS | {"dpi": 10, "page_width": 10}
+
+
+def test__downsample(tmp_path: Path):
+    src = tmp_path / "large.png"
+    Image.new("RGB", (1000, 500)).save(src)
+    out = t.optimize_image(src, SETTINGS, tmp_path / "cache")
+    assert out.parent == tmp_path / "cache"
+    assert Image.open(out).size == (100, 50)
+    assert t.optimize_image(src, SETTINGS, tmp_path / "cache") == out
+
+
+def test__convert_unsupported(tmp_path: Path):
+    src = tmp_path / "image.bmp"
+    Image.new("RGB", (10, 10)).save(src)
+    out = t.optimize_image(src, SETTINGS, tmp_path / "cache")
+    assert out.suffix == ".png"
+    assert Image.open(out).format == "PNG"
+
+
+def test__skip_vector(tmp_path: Path):
+    src = tmp_path / "image.svg"
+    src.write_text("<svg></svg>")
+    assert t.optimize_image(src, SETTINGS, tmp_path / "cache") == src
@@ -0,0 +1,73 @@
+"""Test for index generation."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from atsphinx.typst import indexing as t
+
+if TYPE_CHECKING:
+    from sphinx.testing.util import SphinxTestApp
+
+
+def test__make_label():
+    assert t.make_label("api/module", "index-0") == "idx-api-module--index-0"
+
+
+@pytest.mark.sphinx("typst", testroot="with-index")
+def test__create_index(app: SphinxTestApp):
+    app.build()
+    index = dict(t.create_index(app.env, ["index", "child"]))
+    terms = dict(index["A"])
+    targets, sub_items, _ = terms["alpha"]
+    assert targets == [("", "index#index-0")]
+    assert sub_items == [("child entry", [("", "child#child-target")])]
+    assert "see alpha" in dict(dict(index["D"])["delta"][1])
+
+
+@pytest.mark.sphinx("typst", testroot="with-index")
+def test__filter_docnames(app: SphinxTestApp):
+    app.build()
+    index = dict(t.create_index(app.env, ["child"]))
+    assert list(index) == ["A", "B", "E"]
+
+
+@pytest.mark.sphinx("typst", testroot="with-index")
+def test__render(app: SphinxTestApp):
+    app.build()
+    out = (app.outdir / "index.typ").read_text()
+    assert "in-dexter" not in out
+    assert "#metadata(none) <idx-child--child-target>" in out
+    assert '#index-entry("alpha", ((<idx-index--index-0>, false),))' in out
+
+
+@pytest.mark.sphinx("typstpdf", testroot="with-index", srcdir="index-pdf")
+def test__compile(app: SphinxTestApp):
+    app.build()
+    assert (app.outdir / "index.pdf").exists()
+
+
+@pytest.mark.sphinx(
+    "typstpdf",
+    testroot="with-index",
+    srcdir="index-pdf-toctree-only",
+    confoverrides={
+        "typst_documents": [
+            {
+                "entrypoint": "index",
+                "filename": "index",
+                "theme": "manual",
+                "title": "Test documentation",
+                "toctree_only": True,
+            }
+        ]
+    },
+)
+def test__compile_toctree_only(app: SphinxTestApp):
+    app.build()
+    out = (app.outdir / "index.typ").read_text()
+    assert "<idx-index--index-0>" not in out
+    assert "<idx-child--child-target>" in out
+    assert (app.outdir / "index.pdf").exists()
@@ -0,0 +1,60 @@
+"""Test for package installation."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from atsphinx.typst import packages as t
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _make_source(tmp_path: Path, content: str) -> Path:
+    src = tmp_path / "src"
+    src.mkdir(exist_ok=True)
+    (src / "lib.typ").write_text(content)
+    return src
+
+
+def test__skip_installed(tmp_path: Path):
+    src = _make_source(tmp_path, "#let x = 1")
+    base = tmp_path / "packages"
+    assert t.install_package(src, "example", "1.0.0", package_path=base)
+    assert not t.install_package(src, "example", "1.0.0", package_path=base)
+    assert (base / "local/example/1.0.0/lib.typ").read_text() == "#let x = 1"
+
+
+def test__reinstall_changed(tmp_path: Path):
+    src = _make_source(tmp_path, "#let x = 1")
+    base = tmp_path / "packages"
+    t.install_package(src, "example", "1.0.0", package_path=base)
+    (src / "lib.typ").write_text("#let x = 2")
+    assert t.install_package(src, "example", "1.0.0", package_path=base)
+    assert (base / "local/example/1.0.0/lib.typ").read_text() == "#let x = 2"
+    assert [p.name for p in (base / "local/example").iterdir()] == ["1.0.0"]
+
+
+def test__concurrent(tmp_path: Path):
+    src = _make_source(tmp_path, "#let x = 1")
+    base = tmp_path / "packages"
+
+    def _install(_):
+        return t.install_package(src, "example", "1.0.0", package_path=base)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(_install, range(16)))
+    assert results.count(True) >= 1
+    assert (base / "local/example/1.0.0/lib.typ").read_text() == "#let x = 1"
+    assert [p.name for p in (base / "local/example").iterdir()] == ["1.0.0"]
+
+
+def test__registry_stable_code():
+    registry = t.PackageRegistry()
+    registry.add("@preview/zzz:0.1.0", "b")
+    registry.add("@preview/zzz:0.1.0", "a")
+    registry.add("@local/aaa:0.1.0")
+    assert registry.code == (
+        '#import "@local/aaa:0.1.0": *\n#import "@preview/zzz:0.1.0": a, b'
+    )
@@ -17,3 +17,9 @@ def test__builtin_theme_found():
     assert isinstance(theme, t.Theme)
     assert len(theme._dirs) == 2
     assert theme._dirs[1].stem == "basic"
+
+
+def test__body_as_string():
+    body = t.Body(["Hello", ", ", "world"])
+    assert list(body) == ["Hello", ", ", "world"]
+    assert str(body) == "Hello, world"
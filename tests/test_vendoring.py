@@ -0,0 +1,43 @@
+"""Test for vendoring of Typst packages."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from atsphinx.typst import vendoring as t
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _make_package(cache_dir: Path, name: str, version: str, body: str = "") -> Path:
+    package_dir = cache_dir / "preview" / name / version
+    package_dir.mkdir(parents=True)
+    (package_dir / "lib.typ").write_text(body)
+    return package_dir
+
+
+def test__find_packages(tmp_path: Path):
+    (tmp_path / "a.typ").write_text(
+        '#import "@preview/in-dexter:0.7.2": *\n'
+        '#import "@preview/mitex:0.2.5": mi\n'
+        '#import "@local/atsphinx-typst:0.1.1": desc\n'
+    )
+    assert t.find_packages(tmp_path) == {("in-dexter", "0.7.2"), ("mitex", "0.2.5")}
+
+
+def test__find_missing_dependencies(tmp_path: Path):
+    cache_dir = tmp_path / "cache"
+    _make_package(cache_dir, "outer", "1.0.0", '#import "@preview/inner:0.1.0": *')
+    assert t.find_missing(cache_dir, {("outer", "1.0.0")}) == {("inner", "0.1.0")}
+
+
+def test__vendor_from_sources(tmp_path: Path):
+    source = tmp_path / "user-cache"
+    _make_package(source, "outer", "1.0.0", '#import "@preview/inner:0.1.0": *')
+    _make_package(source, "inner", "0.1.0")
+    cache_dir = tmp_path / "cache"
+    vendored = t.vendor_packages(cache_dir, {("outer", "1.0.0")}, [source])
+    assert vendored == [("outer", "1.0.0"), ("inner", "0.1.0")]
+    assert (cache_dir / "preview/inner/0.1.0/lib.typ").exists()
+    assert t.vendor_packages(cache_dir, {("outer", "1.0.0")}, [source]) == []